@@ -0,0 +1,61 @@
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'progress_display', 'attempts',
+                    'run_at', 'finished')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    empty_value_display = '-пусто-'
+
+    def progress_display(self, task):
+        if task.total is None:
+            return task.progress or None
+        return f'{task.progress} из {task.total}'
+    progress_display.short_description = 'Прогресс'
+
+
+admin.site.register(Task, TaskAdmin)
+
+
+def action_form(modeladmin, request, form, action, title, submit,
+                message=None):
+    """Промежуточная страница действия с формой его параметров.
+
+    Выбранные строки и признак «выбрать все» передаются дальше скрытыми
+    полями, так что форма снова попадает в то же действие. ``message``
+    выводится над формой, например для подтверждения.
+    """
+    select_across = request.POST.get('select_across', '0')
+    context = {
+        **modeladmin.admin_site.each_context(request),
+        'title': title,
+        'opts': modeladmin.model._meta,
+        'form': form,
+        'media': modeladmin.media + form.media,
+        'selected': (() if select_across == '1' else
+                     request.POST.getlist(helpers.ACTION_CHECKBOX_NAME)),
+        'select_across': select_across,
+        'action': action,
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'submit': submit,
+        'message': message,
+    }
+    return TemplateResponse(request, 'admin/action_form.html', context)
+
+
+def message_task(modeladmin, request, task, text):
+    """Сообщение о фоновой задаче действия со ссылкой на её прогресс."""
+    if task is None:
+        modeladmin.message_user(request, f'{text}: выполнено.')
+        return
+    url = reverse('admin:core_task_change', args=(task.pk,))
+    modeladmin.message_user(request, format_html(
+        '{}: задача <a href="{}">№{}</a> поставлена в очередь.',
+        text, url, task.pk))
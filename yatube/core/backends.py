@@ -0,0 +1,71 @@
+"""Загрузка пользователя запроса из кэша.
+
+``AuthenticationMiddleware`` на каждый запрос достаёт пользователя по id
+из сессии. Бэкенд кладёт поля пользователя в общий кэш ``USER_CACHE`` на
+``USER_CACHE_TIMEOUT`` секунд; сохранение или удаление пользователя
+сбрасывает запись сигналом во всех процессах сразу, так что смена пароля
+или снятие ``is_active`` и ``is_staff`` действуют с первого же запроса.
+
+Хеш пароля в кэш не попадает: вместо него хранится HMAC для проверки
+сессии, а сам пароль дочитывается из базы, только когда он нужен.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .purge import pre_purge
+
+USER_KEY = 'auth-user-fields:{}'
+
+
+def _cache():
+    return caches[settings.USER_CACHE]
+
+
+def _dump(user):
+    names = [field.attname for field in user._meta.concrete_fields
+             if field.attname != 'password']
+    return (names, [getattr(user, name) for name in names],
+            user.get_session_auth_hash())
+
+
+def _load(data):
+    names, values, session_hash = data
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, names, values)
+    user.get_session_auth_hash = lambda: session_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        data = _cache().get(key)
+        if data is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            _cache().set(key, _dump(user), settings.USER_CACHE_TIMEOUT)
+        else:
+            user = _load(data)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user(sender, instance, **kwargs):
+    # После смены пароля хеш сессии считается заново из нового пароля.
+    instance.__dict__.pop('get_session_auth_hash', None)
+    key = USER_KEY.format(instance.pk)
+    _cache().delete(key)
+    transaction.on_commit(lambda: _cache().delete(key))
+
+
+@receiver(pre_purge, sender=get_user_model())
+def forget_purged_users(sender, queryset, **kwargs):
+    keys = [USER_KEY.format(pk)
+            for pk in queryset.values_list('pk', flat=True)]
+    transaction.on_commit(lambda: _cache().delete_many(keys))
@@ -0,0 +1,154 @@
+"""Общий кэш для состояния, которое читают разные процессы.
+
+Граф подписок, пользователь запроса и другие записи меняет один процесс
+(веб или воркер ``runworker``), а читают все. Кэш в памяти процесса
+(``LocMemCache``) сбрасывается только у того, кто его изменил, поэтому
+такие записи требуют общего бэкенда: memcached, redis или
+``AtomicFileBasedCache`` на одной машине. Счётчики и блокировки на
+``add``/``incr`` требуют ещё и атомарности этих операций; проверка
+``core.E001`` не даёт запустить проект с другим кэшем.
+"""
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.checks import Error, Tags, register
+from django.core.files import locks
+from django.core.files.move import file_move_safe
+from django.db import connection
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+# Настройки с псевдонимами кэшей, которые должны быть общими.
+SHARED_CACHE_SETTINGS = (
+    'SESSION_CACHE_ALIAS', 'USER_CACHE', 'FOLLOW_GRAPH_CACHE',
+    'TRENDING_CACHE', 'NOTIFICATIONS_CACHE', 'MUTES_CACHE',
+    'RATELIMIT_CACHE', 'COUNT_CACHE',
+)
+
+# Общие между процессами бэкенды с атомарными add и incr.
+ATOMIC_BACKENDS = (
+    'core.caches.AtomicFileBasedCache',
+    'django.core.cache.backends.memcached.MemcachedCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+)
+
+LOCK_STRIPES = 256
+
+
+class AtomicFileBasedCache(FileBasedCache):
+    """Файловый кэш с атомарными ``add`` и ``incr``.
+
+    В Django 2.2 обе операции — чтение и запись без блокировки, поэтому
+    конкурентные процессы теряют приращения и вместе проходят ``add``.
+    Здесь они выполняются под ``flock`` на один из ``LOCK_STRIPES`` файлов
+    по хэшу ключа, а ``incr`` сохраняет срок жизни записи, как memcached.
+    """
+
+    @contextmanager
+    def _locked(self, fname):
+        lock_dir = os.path.join(self._dir, 'locks')
+        os.makedirs(lock_dir, 0o700, exist_ok=True)
+        stripe = int(os.path.basename(fname)[:8], 16) % LOCK_STRIPES
+        with open(os.path.join(lock_dir, f'{stripe}.lock'), 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def _read(self, fname):
+        """Пара (срок, значение) или None, если записи нет или она истекла.
+        """
+        try:
+            with open(fname, 'rb') as f:
+                try:
+                    expiry = pickle.load(f)
+                except EOFError:
+                    return None
+                if expiry is not None and expiry < time.time():
+                    return None
+                return expiry, pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, fname, expiry, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        renamed = False
+        try:
+            with open(fd, 'wb') as f:
+                f.write(pickle.dumps(expiry, self.pickle_protocol))
+                f.write(zlib.compress(
+                    pickle.dumps(value, self.pickle_protocol)))
+            file_move_safe(tmp_path, fname, allow_overwrite=True)
+            renamed = True
+        finally:
+            if not renamed:
+                os.remove(tmp_path)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        fname = self._key_to_file(key, version)
+        with self._locked(fname):
+            if self._read(fname) is not None:
+                return False
+            self.set(key, value, timeout, version)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._locked(fname):
+            entry = self._read(fname)
+            if entry is None:
+                raise ValueError("Key '%s' not found" % key)
+            expiry, value = entry
+            value += delta
+            self._write(fname, expiry, value)
+            return value
+
+
+def shared_aliases():
+    return {getattr(settings, name) for name in SHARED_CACHE_SETTINGS}
+
+
+def make_key(key, key_prefix, version):
+    """Ключ с именем базы: тесты и сервер с разными базами не делят записи.
+    """
+    return '{}:{}:{}:{}'.format(
+        connection.settings_dict['NAME'], key_prefix, version, key)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, name)
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend not in ATOMIC_BACKENDS:
+            errors.append(Error(
+                f'{name} = {alias!r} использует кэш без общих атомарных '
+                f'add и incr: {backend}.',
+                hint='Укажите memcached, redis или '
+                     'core.caches.AtomicFileBasedCache.',
+                id='core.E001',
+            ))
+    return errors
+
+
+@receiver(post_migrate)
+def clear_shared_caches(sender, **kwargs):
+    """Сбрасывает общие кэши вместе со схемой базы.
+
+    Записи ссылаются на строки по id, а после миграции новой базы, в том
+    числе тестовой, те же id принадлежат другим строкам.
+    """
+    if sender.name == 'core':
+        for alias in shared_aliases():
+            caches[alias].clear()
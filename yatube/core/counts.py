@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections, router
+
+COUNT_KEY = 'count:{}'
+GENERATION_KEY = 'count-generation:{}'
+REFRESH_LOCK_KEY = 'count-refresh:{}'
+
+
+def table_estimate(model):
+    """Число строк таблицы по статистике СУБД или None, если её нет."""
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': (
+            'SELECT reltuples::bigint FROM pg_class '
+            'WHERE oid = %s::regclass'
+        ),
+        'mysql': (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        ),
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # sqlite_stat1 появляется только после ANALYZE.
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+def _count_key(queryset):
+    sql = str(queryset.query).encode()
+    return hashlib.md5(sql).hexdigest()
+
+
+def _cache():
+    return caches[settings.COUNT_CACHE]
+
+
+def _store(key, value):
+    _cache().set(COUNT_KEY.format(key), (value, time.time()),
+                 settings.COUNT_CACHE_STALE_SECONDS)
+
+
+def _refresh(queryset, key):
+    try:
+        _store(key, queryset.count())
+    finally:
+        connections.close_all()
+        _cache().delete(REFRESH_LOCK_KEY.format(key))
+
+
+def estimate_count(queryset):
+    """Приблизительное число объектов в выборке и признак точности.
+
+    Для выборки по всей таблице берётся статистика СУБД, иначе — число из
+    кэша. Устаревшее значение отдаётся сразу, а пересчёт уходит в фоновый
+    поток, чтобы COUNT(*) не задерживал ответ. Числа, посчитанные до
+    ``forget_model``, не используются. Точным считается число, которое
+    дал COUNT(*) в пределах ``COUNT_CACHE_SECONDS``.
+    """
+    if not queryset.query.where:
+        estimate = table_estimate(queryset.model)
+        if estimate is not None:
+            return estimate, False
+    cache = _cache()
+    key = _count_key(queryset)
+    generation_key = GENERATION_KEY.format(queryset.model._meta.db_table)
+    found = cache.get_many([COUNT_KEY.format(key), generation_key])
+    cached = found.get(COUNT_KEY.format(key))
+    if cached is not None and cached[1] <= found.get(generation_key, 0):
+        cached = None
+    if cached is None:
+        value = queryset.count()
+        _store(key, value)
+        return value, True
+    value, counted_at = cached
+    stale = time.time() - counted_at > settings.COUNT_CACHE_SECONDS
+    if not stale:
+        return value, True
+    # add атомарен в общем кэше (core.E001): пересчёт запускает один
+    # процесс, остальные отдают устаревшее число.
+    if cache.add(REFRESH_LOCK_KEY.format(key), True,
+                 settings.COUNT_CACHE_SECONDS):
+        if settings.COUNT_REFRESH_ASYNC:
+            threading.Thread(target=_refresh, args=(queryset.all(), key),
+                             daemon=True).start()
+        else:
+            value = queryset.count()
+            _store(key, value)
+            cache.delete(REFRESH_LOCK_KEY.format(key))
+            return value, True
+    return value, False
+
+
+def approximate_count(queryset):
+    """Приблизительное число объектов в выборке (см. ``estimate_count``)."""
+    return estimate_count(queryset)[0]
+
+
+def forget_model(model):
+    """Сбрасывает закэшированные числа всех выборок по таблице модели."""
+    _cache().set(GENERATION_KEY.format(model._meta.db_table), time.time(),
+                 settings.COUNT_CACHE_STALE_SECONDS)
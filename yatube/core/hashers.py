@@ -0,0 +1,80 @@
+"""Хешер паролей на scrypt из стандартной библиотеки.
+
+Формат хеша совпадает с ``ScryptPasswordHasher`` из Django 4.0, поэтому
+после обновления Django хеши останутся рабочими. Стоимость задают
+атрибуты класса; при их изменении ``must_update`` заставляет Django
+перехешировать пароль при следующем входе.
+"""
+import base64
+import hashlib
+
+from django.contrib.auth.hashers import BasePasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    algorithm = 'scrypt'
+    work_factor = 2 ** 14
+    block_size = 8
+    parallelism = 1
+
+    def _hash(self, password, salt, work_factor, block_size, parallelism):
+        # Буфер scrypt — 128 * n * r байт; OpenSSL по умолчанию даёт 32 МБ.
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=work_factor,
+            r=block_size, p=parallelism,
+            maxmem=2 * 128 * work_factor * block_size, dklen=64)
+        return base64.b64encode(hash_).decode('ascii').strip()
+
+    def encode(self, password, salt, work_factor=None, block_size=None,
+               parallelism=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        work_factor = work_factor or self.work_factor
+        block_size = block_size or self.block_size
+        parallelism = parallelism or self.parallelism
+        hash_ = self._hash(password, salt, work_factor, block_size,
+                           parallelism)
+        return (f'{self.algorithm}${work_factor}${salt}${block_size}'
+                f'${parallelism}${hash_}')
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = (
+            encoded.split('$', 5))
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'],
+            decoded['block_size'], decoded['parallelism'])
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['work_factor'],
+            _('block size'): decoded['block_size'],
+            _('parallelism'): decoded['parallelism'],
+            _('salt'): mask_hash(decoded['salt']),
+            _('hash'): mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (decoded['work_factor'], decoded['block_size'],
+                decoded['parallelism']) != (
+            self.work_factor, self.block_size, self.parallelism)
+
+    def harden_runtime(self, password, encoded):
+        pass
@@ -0,0 +1,99 @@
+"""Очередь исходящей почты.
+
+``QueuedEmailBackend`` не отправляет письма сам: он ставит их пакетами до
+``EMAIL_QUEUE_BATCH`` в очередь задач ``core.Task`` и сразу возвращает
+управление. Очередь хранится в базе, поэтому письма переживают
+перезапуск, деплой и падение процесса. Воркер ``runworker`` отправляет
+пакет через одно соединение бэкенда ``EMAIL_QUEUE_BACKEND``; письма,
+которые не удалось отправить, снова ставятся в очередь с экспоненциальной
+задержкой, пока не кончатся попытки ``EMAIL_QUEUE_MAX_ATTEMPTS``.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+
+def dump(message):
+    """Письмо в виде словаря для JSON-аргументов задачи."""
+    if message.attachments:
+        raise ValueError('Очередь почты не принимает вложения')
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'content_subtype': message.content_subtype,
+    }
+
+
+def load(data):
+    data = dict(data)
+    content_subtype = data.pop('content_subtype')
+    message = EmailMultiAlternatives(**data)
+    message.content_subtype = content_subtype
+    return message
+
+
+def _close(connection):
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return None
+
+
+@task
+def deliver(messages, attempt=1):
+    """Отправляет пакет писем через одно соединение."""
+    connection = None
+    failed = []
+    for data in messages:
+        try:
+            if connection is None:
+                connection = get_connection(
+                    settings.EMAIL_QUEUE_BACKEND, fail_silently=False)
+                connection.open()
+            connection.send_messages([load(data)])
+        except Exception:
+            logger.warning('Письмо не отправлено, попытка %s', attempt,
+                           exc_info=True)
+            failed.append(data)
+            connection = _close(connection)
+    _close(connection)
+    if not failed:
+        return
+    if attempt >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        for data in failed:
+            logger.error('Письмо для %s не отправлено за %s попыток',
+                         data['to'], attempt)
+        return
+    delay = settings.EMAIL_QUEUE_RETRY_BACKOFF * 2 ** (attempt - 1)
+    deliver.schedule(timezone.now() + timedelta(seconds=delay),
+                     failed, attempt + 1)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который отправляет письма через очередь задач."""
+
+    def send_messages(self, email_messages):
+        messages = [
+            dump(message) for message in email_messages
+            if message.recipients()]
+        batch = settings.EMAIL_QUEUE_BATCH
+        for start in range(0, len(messages), batch):
+            deliver.delay(messages[start:start + batch])
+        return len(messages)
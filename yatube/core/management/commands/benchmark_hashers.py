@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+# Атрибут стоимости хешера и как получить из него дешевле и дороже.
+COSTS = {
+    'work_factor': lambda cost: (cost // 2, cost * 2),
+    'iterations': lambda cost: (cost // 2, cost * 2),
+    'time_cost': lambda cost: (max(cost // 2, 1), cost * 2),
+    'rounds': lambda cost: (cost - 1, cost + 1),
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет, сколько входов и регистраций в секунду выдерживает '
+            'одно ядро с каждым хешером из PASSWORD_HASHERS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=2,
+            help='Длительность замера одной настройки.')
+        parser.add_argument(
+            '--no-variants', action='store_true',
+            help='Не замерять вдвое более дешёвую и дорогую стоимость.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"хешер":<28} {"стоимость":>20} '
+                          f'{"входов/с":>10} {"мс на вход":>11}')
+        for path in settings.PASSWORD_HASHERS:
+            hasher_class = import_string(path)
+            try:
+                if hasher_class.library:
+                    hasher_class()._load_library()
+            except ValueError:
+                self.stdout.write(f'{hasher_class.__name__:<28} '
+                                  f'не установлена библиотека')
+                continue
+            for hasher, cost in self.variants(hasher_class, options):
+                rate = self.measure(hasher, options['seconds'])
+                self.stdout.write(
+                    f'{hasher_class.__name__:<28} {cost:>20} '
+                    f'{rate:>10.1f} {1000 / rate:>11.1f}')
+
+    def variants(self, hasher_class, options):
+        hasher = hasher_class()
+        attribute = next(
+            (name for name in COSTS if hasattr(hasher, name)), None)
+        if attribute is None:
+            yield hasher, '-'
+            return
+        cost = getattr(hasher, attribute)
+        costs = [cost]
+        if not options['no_variants']:
+            cheaper, dearer = COSTS[attribute](cost)
+            costs = [cheaper, cost, dearer]
+        for value in costs:
+            variant = type(hasher_class.__name__, (hasher_class,),
+                           {attribute: value})
+            yield variant(), f'{attribute}={value}'
+
+    def measure(self, hasher, seconds):
+        """Проверок пароля в секунду — столько стоит вход."""
+        encoded = hasher.encode('correct horse', hasher.salt())
+        done = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds or not done:
+            hasher.verify('correct horse', encoded)
+            done += 1
+        return done / (time.perf_counter() - started)
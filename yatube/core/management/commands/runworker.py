@@ -0,0 +1,54 @@
+import multiprocessing
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils.module_loading import autodiscover_modules
+
+from core.tasks import metrics, work
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Число параллельных воркеров.')
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread',
+            help='Запускать воркеры в потоках или в процессах.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться.')
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать метрики очереди и завершиться.')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        if options['stats']:
+            for name, value in metrics().items():
+                self.stdout.write(f'{name}: {value}')
+            return
+        if options['pool'] == 'process':
+            # Дочерние процессы не должны наследовать открытые соединения.
+            connections.close_all()
+            stop_event = multiprocessing.Event()
+            worker_class = multiprocessing.Process
+        else:
+            stop_event = threading.Event()
+            worker_class = threading.Thread
+        workers = [
+            worker_class(target=work, args=(stop_event, options['once']))
+            for _ in range(options['concurrency'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
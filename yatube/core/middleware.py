@@ -0,0 +1,16 @@
+from django.conf import settings
+
+from .writebuffer import buffer
+
+
+class WriteBufferMiddleware:
+    """Дожидается записей пользователя из буфера перед его запросом."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (settings.WRITE_BUFFER_MODE != 'sync'
+                and request.user.is_authenticated):
+            buffer.wait_for(request.user.pk)
+        return self.get_response(request)
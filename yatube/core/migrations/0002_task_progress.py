@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='progress',
+            field=models.PositiveIntegerField(default=0, verbose_name='Обработано'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='total',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Всего'),
+        ),
+    ]
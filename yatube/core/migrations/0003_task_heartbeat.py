@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:16
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_heartbeat(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    Task.objects.filter(status='running').update(heartbeat=F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_task_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Отметка воркера'),
+        ),
+        migrations.RunPython(fill_heartbeat, migrations.RunPython.noop),
+    ]
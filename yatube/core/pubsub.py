@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+class LocalBroker:
+    """Pub/sub внутри процесса.
+
+    События каждого канала лежат в кольцевом буфере с порядковыми номерами,
+    подписчики ждут на общем Condition и не опрашивают хранилище.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or settings.PUBSUB_BUFFER_SIZE
+        self._channels = {}
+        self._condition = threading.Condition()
+
+    def _channel(self, channel):
+        return self._channels.setdefault(
+            channel, [0, deque(maxlen=self.size)])
+
+    def publish(self, channel, message):
+        with self._condition:
+            state = self._channel(channel)
+            state[0] += 1
+            state[1].append(message)
+            self._condition.notify_all()
+            return state[0]
+
+    def last_seq(self, channel):
+        with self._condition:
+            return self._channel(channel)[0]
+
+    def wait(self, channel, seq, timeout):
+        """События канала с номером больше ``seq``.
+
+        Если их нет, ждёт не дольше ``timeout`` секунд. Возвращает список
+        пар ``(номер, сообщение)``.
+        """
+        with self._condition:
+            state = self._channel(channel)
+            self._condition.wait_for(lambda: state[0] > seq, timeout)
+            last, events = state
+            first = last - len(events) + 1
+            start = max(seq + 1, first)
+            return list(zip(range(start, last + 1),
+                            islice(events, start - first, None)))
+
+
+class CacheBroker:
+    """Pub/sub через общий кэш — замена внешнего брокера.
+
+    Работает между процессами, если кэш общий (memcached, redis), но
+    подписчики опрашивают кэш раз в ``PUBSUB_POLL_SECONDS``.
+    """
+
+    SEQ_KEY = 'pubsub:{}:seq'
+    EVENT_KEY = 'pubsub:{}:{}'
+
+    def __init__(self, size=None):
+        self.size = size or settings.PUBSUB_BUFFER_SIZE
+
+    def publish(self, channel, message):
+        key = self.SEQ_KEY.format(channel)
+        cache.add(key, 0, None)
+        seq = cache.incr(key)
+        cache.set(self.EVENT_KEY.format(channel, seq), message,
+                  settings.STREAM_MAX_SECONDS)
+        return seq
+
+    def last_seq(self, channel):
+        return cache.get(self.SEQ_KEY.format(channel), 0)
+
+    def wait(self, channel, seq, timeout):
+        deadline = time.monotonic() + timeout
+        last = self.last_seq(channel)
+        while last <= seq and time.monotonic() < deadline:
+            time.sleep(settings.PUBSUB_POLL_SECONDS)
+            last = self.last_seq(channel)
+        numbers = range(max(seq + 1, last - self.size + 1), last + 1)
+        keys = {self.EVENT_KEY.format(channel, n): n for n in numbers}
+        found = cache.get_many(keys)
+        return [(number, found[key]) for key, number in keys.items()
+                if key in found]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.PUBSUB_BROKER)()
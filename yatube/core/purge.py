@@ -0,0 +1,83 @@
+"""Массовое удаление без построчного каскада.
+
+``QuerySet.delete()`` загружает в память все зависимые объекты и шлёт
+сигналы по каждому. ``purge`` обходит связи модели так же, как
+``Collector``, но удаляет зависимые строки запросами вида
+``DELETE ... WHERE fk IN (подзапрос)``. Вместо ``post_delete`` перед
+удалением каждой выборки отправляется ``pre_purge``: по нему сбрасывают
+кэши и счётчики, которые обычно поддерживают сигналы модели.
+"""
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.deletion import (ProtectedError,
+                                       get_candidate_relations_to_delete)
+from django.dispatch import Signal
+
+pre_purge = Signal(providing_args=['queryset'])
+
+
+def _with_descendants(queryset, field):
+    # Самоссылающийся каскад: собираем потомков по уровням, иначе обход
+    # связей зациклится.
+    pks = set(queryset.values_list('pk', flat=True))
+    frontier = pks
+    while frontier:
+        frontier = set(queryset.model._base_manager.filter(**{
+            field.name + '__in': frontier}).values_list('pk', flat=True))
+        frontier -= pks
+        pks |= frontier
+    return queryset.model._base_manager.filter(pk__in=pks)
+
+
+def purge(queryset):
+    """Удаляет выборку вместе с зависимыми объектами; возвращает число."""
+    model = queryset.model
+    relations = list(get_candidate_relations_to_delete(model._meta))
+    for relation in relations:
+        field = relation.field
+        if (field.model is model
+                and field.remote_field.on_delete is models.CASCADE):
+            queryset = _with_descendants(queryset, field)
+    for relation in relations:
+        field = relation.field
+        on_delete = field.remote_field.on_delete
+        related = field.model._base_manager.filter(
+            **{field.name + '__in': queryset})
+        if on_delete is models.DO_NOTHING:
+            continue
+        if on_delete is models.SET_NULL:
+            related.update(**{field.name: None})
+        elif on_delete is models.PROTECT:
+            if related.exists():
+                raise ProtectedError(
+                    f'Удаление запрещено связью {field}', related)
+        elif on_delete is not models.CASCADE:
+            raise ValueError(f'Связь {field} не поддерживается')
+        elif field.model is not model:
+            purge(related)
+    pre_purge.send(sender=model, queryset=queryset)
+    return queryset._raw_delete(queryset.db)
+
+
+def purge_in_chunks(queryset, progress=None):
+    """Удаляет выборку пачками по pk, каждую в своей транзакции.
+
+    После каждой пачки вызывает ``progress`` с числом удалённых объектов
+    выборки, не считая зависимых.
+    """
+    last = None
+    deleted = 0
+    while True:
+        chunk = queryset.order_by('pk')
+        if last is not None:
+            chunk = chunk.filter(pk__gt=last)
+        pks = list(chunk.values_list('pk', flat=True)[
+            :settings.PURGE_CHUNK_SIZE])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            purge(queryset.model._base_manager.filter(pk__in=pks))
+        last = pks[-1]
+        deleted += len(pks)
+        if progress is not None:
+            progress(len(pks))
@@ -0,0 +1,85 @@
+"""Ограничение частоты запросов.
+
+Скользящее окно из двух соседних интервалов: число запросов в текущем
+интервале плюс доля предыдущего, пропорциональная ещё не истёкшей его
+части. Счётчики живут в кэше ``RATELIMIT_CACHE``: запись создаётся
+атомарным ``add`` со сроком в два интервала, а увеличивается атомарным
+``incr``, который этот срок не трогает. Такие операции есть не у всех
+бэкендов, их наличие проверяет ``core.E001``.
+"""
+import functools
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .views import too_many_requests
+
+RATELIMIT_KEY = 'rl:{}:{}:{}'
+
+
+def _cache():
+    return caches[settings.RATELIMIT_CACHE]
+
+
+def client_key(request):
+    """Пользователь, а для анонимов — IP-адрес."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'ip:{}'.format(request.META.get('REMOTE_ADDR', ''))
+
+
+def hit(group, key, limit, period, cost=1):
+    """Учитывает ``cost`` запросов; возвращает 0 или секунды до повтора."""
+    now = time.time()
+    window, elapsed = divmod(now, period)
+    current = RATELIMIT_KEY.format(group, key, int(window))
+    cache = _cache()
+    while True:
+        if cache.add(current, cost, period * 2):
+            count = cost
+            break
+        try:
+            count = cache.incr(current, cost)
+            break
+        except ValueError:
+            # Запись истекла между add и incr.
+            continue
+    previous = cache.get(RATELIMIT_KEY.format(group, key, int(window) - 1))
+    if previous:
+        count += previous * (period - elapsed) / period
+    if count <= limit:
+        return 0
+    return math.ceil(period - elapsed)
+
+
+def charge(request, group, cost=1):
+    """Списывает ``cost`` единиц лимита ``group`` с клиента запроса.
+
+    Возвращает 0 или число секунд до повтора. Нужен view, которые за один
+    запрос делают много записей: они платят за каждую.
+    """
+    rule = settings.RATELIMITS.get(group)
+    if not rule or not settings.RATELIMIT_ENABLED:
+        return 0
+    return hit(group, client_key(request), *rule, cost=cost)
+
+
+def ratelimit(group, methods=('POST',)):
+    """Ограничивает вызовы view лимитом ``settings.RATELIMITS[group]``.
+
+    Лимит задаётся парой (число запросов, секунды) и считается отдельно
+    для каждого пользователя или IP. Запросы других методов не
+    учитываются; превышение отвечает 429 с заголовком Retry-After.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = charge(request, group)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,236 @@
+import functools
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Task
+
+REGISTRY = {}
+
+_current = threading.local()
+
+logger = logging.getLogger(__name__)
+
+
+class TaskFunction:
+    """Функция, которую можно поставить в очередь вызовом ``delay()``."""
+
+    def __init__(self, func, max_attempts=None):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        REGISTRY[self.name] = self
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        if settings.TASKS_ALWAYS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        return Task.objects.create(
+            name=self.name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        )
+
+    def schedule(self, run_at, *args, **kwargs):
+        """Ставит задачу в очередь с запуском не раньше ``run_at``.
+
+        Отложенная задача всегда идёт через очередь, даже при
+        ``TASKS_ALWAYS_EAGER``.
+        """
+        return Task.objects.create(
+            name=self.name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs}),
+            run_at=run_at,
+        )
+
+
+def task(func=None, *, max_attempts=None):
+    if func is None:
+        return functools.partial(task, max_attempts=max_attempts)
+    return TaskFunction(func, max_attempts)
+
+
+def claim():
+    """Забирает одну готовую к запуску задачу.
+
+    Захват — условный UPDATE по статусу, поэтому одну задачу не возьмут
+    два воркера даже на SQLite, где нет SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).order_by('run_at').values_list('pk', flat=True)
+    for pk in candidates[:settings.TASK_CLAIM_BATCH]:
+        claimed = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, started=now, heartbeat=now,
+            attempts=F('attempts') + 1)
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def requeue_expired():
+    """Возвращает в очередь задачи, воркер которых пропал.
+
+    Воркер отмечается в ``heartbeat`` при захвате задачи и затем каждые
+    ``TASK_HEARTBEAT_SECONDS``, пока выполняет её. Задача без отметки
+    дольше ``TASK_LEASE_SECONDS`` считается неудачной попыткой: она снова
+    ставится в очередь или, если попытки кончились, помечается ошибкой.
+    """
+    now = timezone.now()
+    border = now - timedelta(seconds=settings.TASK_LEASE_SECONDS)
+    requeued = 0
+    for task in Task.objects.filter(status=Task.RUNNING,
+                                    heartbeat__lt=border):
+        func = REGISTRY.get(task.name)
+        max_attempts = func.max_attempts if func else 1
+        fields = {'last_error': 'Воркер не завершил задачу вовремя'}
+        if task.attempts >= max_attempts:
+            fields.update(status=Task.FAILED, finished=now)
+        else:
+            fields.update(status=Task.PENDING, run_at=now)
+        # Условие по отметке: задачу, воркер которой только что
+        # отозвался, не трогаем.
+        requeued += Task.objects.filter(
+            pk=task.pk, status=Task.RUNNING, heartbeat=task.heartbeat
+        ).update(**fields)
+    return requeued
+
+
+def _claimed(task):
+    """Задача, пока её держит этот запуск, а не повторный после аренды."""
+    return Task.objects.filter(pk=task.pk, status=Task.RUNNING,
+                               started=task.started, attempts=task.attempts)
+
+
+class Heartbeat(threading.Thread):
+    """Продлевает аренду задачи, пока её выполняет воркер."""
+
+    def __init__(self, task):
+        super().__init__(daemon=True)
+        self.task = task
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.TASK_HEARTBEAT_SECONDS):
+                _claimed(self.task).update(heartbeat=timezone.now())
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def report_progress(progress, total=None):
+    """Сохраняет прогресс выполняемой задачи; вне воркера ничего не делает."""
+    task = getattr(_current, 'task', None)
+    if task is None:
+        return
+    fields = {'progress': progress, 'heartbeat': timezone.now()}
+    if total is not None:
+        fields['total'] = total
+    _claimed(task).update(**fields)
+
+
+def execute(task):
+    func = REGISTRY.get(task.name)
+    _current.task = task
+    heartbeat = Heartbeat(task)
+    heartbeat.start()
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {task.name}')
+        payload = json.loads(task.payload)
+        func(*payload.get('args', ()), **payload.get('kwargs', {}))
+    except Exception:
+        task.last_error = traceback.format_exc()
+        max_attempts = func.max_attempts if func else 1
+        if task.attempts >= max_attempts:
+            task.status = Task.FAILED
+            task.finished = timezone.now()
+        else:
+            task.status = Task.PENDING
+            delay = settings.TASK_RETRY_BACKOFF * 2 ** (task.attempts - 1)
+            task.run_at = timezone.now() + timedelta(seconds=delay)
+    else:
+        task.status = Task.DONE
+        task.finished = timezone.now()
+    finally:
+        _current.task = None
+        heartbeat.stop()
+    # Задачу, которую после истёкшей аренды уже вернули в очередь или
+    # взял другой воркер, этот запуск не перезаписывает.
+    if not _claimed(task).update(
+            status=task.status, run_at=task.run_at,
+            finished=task.finished, last_error=task.last_error):
+        logger.warning('Задача %s потеряла аренду до завершения', task.pk)
+    return task
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи и возвращает их число."""
+    requeue_expired()
+    done = 0
+    while limit is None or done < limit:
+        task = claim()
+        if task is None:
+            break
+        execute(task)
+        done += 1
+    return done
+
+
+def purge_finished():
+    border = timezone.now() - timedelta(seconds=settings.TASK_RESULT_TTL)
+    Task.objects.filter(status=Task.DONE, finished__lt=border).delete()
+
+
+def work(stop_event, once=False):
+    """Цикл воркера: выполняет задачи, пока не будет выставлен stop_event."""
+    try:
+        while not stop_event.is_set():
+            if run_pending(settings.TASK_CLAIM_BATCH):
+                continue
+            if once:
+                break
+            purge_finished()
+            time.sleep(settings.TASK_POLL_SECONDS)
+    finally:
+        connections.close_all()
+
+
+def metrics():
+    """Размер очереди по статусам, задержка и длительность выполнения."""
+    now = timezone.now()
+    stats = {status: 0 for status, _ in Task.STATUSES}
+    stats.update(
+        Task.objects.values_list('status').annotate(Count('pk')).order_by())
+    oldest = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).order_by('run_at').values_list('run_at', flat=True).first()
+    stats['lag_seconds'] = (now - oldest).total_seconds() if oldest else 0
+    recent = Task.objects.filter(
+        status=Task.DONE
+    ).order_by('-finished').values_list(
+        'created', 'started', 'finished')[:settings.TASK_METRICS_WINDOW]
+    if recent:
+        stats['avg_wait_seconds'] = sum(
+            (started - created).total_seconds()
+            for created, started, _ in recent) / len(recent)
+        stats['avg_run_seconds'] = sum(
+            (finished - started).total_seconds()
+            for _, started, finished in recent) / len(recent)
+    return stats
@@ -0,0 +1,84 @@
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.template import Library
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+from core.changelist import date_range, period_starts
+
+register = Library()
+
+
+def indexed_date_hierarchy(cl):
+    """Иерархия дат, как у стандартного тега, но без полного прохода.
+
+    Работает с ``core.changelist.IndexedDateChangeList``.
+    """
+    field = cl.date_hierarchy
+    year_field = field + '__year'
+    month_field = field + '__month'
+    day_field = field + '__day'
+
+    def link(filters):
+        return cl.get_query_string(filters, [field + '__'])
+
+    period = cl.date_period()
+    if period is None:
+        first, last = date_range(cl.queryset, field)
+        if first is not None and first.year == last.year:
+            period = first, 'month' if first.month == last.month else 'year'
+    if period is None:
+        return {
+            'show': True,
+            'back': None,
+            'choices': [{
+                'link': link({year_field: str(year.year)}),
+                'title': str(year.year),
+            } for year in period_starts(cl.queryset, field, 'year')],
+        }
+    start, kind = period
+    if kind == 'day':
+        return {
+            'show': True,
+            'back': {
+                'link': link({year_field: start.year,
+                              month_field: start.month}),
+                'title': capfirst(
+                    formats.date_format(start, 'YEAR_MONTH_FORMAT')),
+            },
+            'choices': [{'title': capfirst(
+                formats.date_format(start, 'MONTH_DAY_FORMAT'))}],
+        }
+    if kind == 'month':
+        return {
+            'show': True,
+            'back': {
+                'link': link({year_field: start.year}),
+                'title': str(start.year),
+            },
+            'choices': [{
+                'link': link({year_field: start.year,
+                              month_field: start.month,
+                              day_field: day.day}),
+                'title': capfirst(
+                    formats.date_format(day, 'MONTH_DAY_FORMAT')),
+            } for day in period_starts(cl.queryset, field, 'day')],
+        }
+    return {
+        'show': True,
+        'back': {'link': link({}), 'title': _('All dates')},
+        'choices': [{
+            'link': link({year_field: start.year, month_field: month.month}),
+            'title': capfirst(formats.date_format(month, 'YEAR_MONTH_FORMAT')),
+        } for month in period_starts(cl.queryset, field, 'month')],
+    }
+
+
+@register.tag(name='indexed_date_hierarchy')
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser, token,
+        func=indexed_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
@@ -17,3 +17,11 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html',
+                      {'retry_after': retry_after},
+                      status=HTTPStatus.TOO_MANY_REQUESTS)
+    response['Retry-After'] = retry_after
+    return response
@@ -0,0 +1,174 @@
+"""Буфер записи для частых мелких вставок.
+
+Режим задаёт ``settings.WRITE_BUFFER_MODE``:
+
+* ``sync`` — объект сохраняется сразу, как без буфера;
+* ``group`` — групповой коммит: записи собираются в одну транзакцию,
+  а вызывающий ждёт её фиксации, поэтому после возврата запись надёжна;
+* ``async`` — вызывающий не ждёт; накопленное теряется при падении
+  процесса, но не при штатной остановке.
+
+Пакет сбрасывается, когда набралось ``WRITE_BUFFER_BATCH`` записей или
+прошло ``WRITE_BUFFER_FLUSH_SECONDS``. Каждый объект сохраняется своим
+``save()`` в точке сохранения общей транзакции: сигналы работают как
+обычно, а ошибка одной записи не откатывает остальные.
+
+Буфер живёт в памяти процесса. ``WriteBufferMiddleware`` дожидается
+записей автора только в своём процессе: если следующий запрос автора
+попадёт в другой воркер, он может не увидеть свою запись, пока её пакет
+не зафиксирован, то есть до ``WRITE_BUFFER_FLUSH_SECONDS``. Поэтому
+``group`` и ``async`` рассчитаны на один процесс с потоками или на
+балансировку, которая держит пользователя на одном воркере.
+
+Замер ``manage.py benchmark_writebuffer`` на SQLite в файле, вставки
+комментариев с сигналами, строк в секунду::
+
+    потоков   sync  group  async
+          1    338    112    796
+         16    284    510    708
+         48    272    637    708
+
+Групповой коммит платит за каждую запись до интервала сброса и
+выигрывает только при параллельных писателях, поэтому по умолчанию
+стоит ``sync``.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class PendingWrite:
+    def __init__(self, instance, owner, waited):
+        self.instance = instance
+        self.owner = owner
+        self.waited = waited
+        self.error = None
+        self.done = threading.Event()
+
+
+class WriteBuffer:
+    def __init__(self):
+        self.items = []
+        self.pending = defaultdict(int)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.urgent = False
+        self.flushes = 0
+        self.written = 0
+
+    def write(self, instance, owner=None, wait=True):
+        """Ставит объект в очередь; с ``wait`` ждёт фиксации пакета."""
+        item = PendingWrite(instance, owner, wait)
+        with self.condition:
+            self._start()
+            self.items.append(item)
+            self.pending[owner] += 1
+            if (len(self.items) == 1
+                    or len(self.items) >= settings.WRITE_BUFFER_BATCH):
+                self.condition.notify_all()
+        if wait:
+            item.done.wait()
+            if item.error is not None:
+                raise item.error
+        return instance
+
+    def wait_for(self, owner):
+        """Сбрасывает буфер, если в нём есть записи владельца.
+
+        Так автор сразу видит свои записи, а остальные читатели не ждут.
+        """
+        with self.condition:
+            if not self.pending.get(owner):
+                return
+            self.urgent = True
+            self.condition.notify_all()
+            while self.pending.get(owner):
+                self.condition.wait()
+
+    def flush(self):
+        """Синхронно записывает всё накопленное."""
+        with self.condition:
+            batch, self.items = self.items, []
+        if batch:
+            self._commit(batch)
+
+    def _start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(
+                target=self._run, name='write-buffer', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                self._commit(self._next_batch())
+        finally:
+            connections.close_all()
+
+    def _next_batch(self):
+        # Срок отсчитывается от первой записи пакета, поэтому задержка
+        # любой записи не больше WRITE_BUFFER_FLUSH_SECONDS.
+        with self.condition:
+            while not self.items:
+                self.condition.wait()
+            deadline = time.monotonic() + settings.WRITE_BUFFER_FLUSH_SECONDS
+            while (len(self.items) < settings.WRITE_BUFFER_BATCH
+                   and not self.urgent):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                self.condition.wait(timeout)
+            self.urgent = False
+            batch = self.items[:settings.WRITE_BUFFER_BATCH]
+            del self.items[:len(batch)]
+            return batch
+
+    def _commit(self, batch):
+        try:
+            with transaction.atomic():
+                for item in batch:
+                    try:
+                        with transaction.atomic():
+                            item.instance.save()
+                    except Exception as error:
+                        item.error = error
+        except Exception as error:
+            for item in batch:
+                item.error = item.error or error
+        self._release(batch)
+
+    def _release(self, batch):
+        with self.condition:
+            self.flushes += 1
+            for item in batch:
+                if item.error is None:
+                    self.written += 1
+                elif not item.waited:
+                    logger.error('Не удалось записать %r', item.instance,
+                                 exc_info=item.error)
+                self.pending[item.owner] -= 1
+                if not self.pending[item.owner]:
+                    del self.pending[item.owner]
+                item.done.set()
+            self.condition.notify_all()
+
+
+buffer = WriteBuffer()
+atexit.register(buffer.flush)
+
+
+def write(instance, owner=None):
+    """Сохраняет объект согласно ``settings.WRITE_BUFFER_MODE``."""
+    mode = settings.WRITE_BUFFER_MODE
+    if mode == 'sync':
+        with transaction.atomic():
+            instance.save()
+        return instance
+    return buffer.write(instance, owner, wait=mode == 'group')
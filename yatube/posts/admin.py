@@ -1,17 +1,214 @@
+import re
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+
+from core.admin import action_form, message_task
+from core.changelist import IndexedDateChangeList
+
+from . import moderation, revisions
+from .models import Comment, Follow, Group, GroupSubscription, Post
+from .search import search_posts
+from .utils import ApproximatePaginator
+
+
+class AdminPaginator(ApproximatePaginator):
+    """Пагинатор с оценкой числа записей для списков админки.
+
+    Страница остаётся срезом QuerySet: по ней строится формсет
+    ``list_editable``.
+    """
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class RowAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которому выбранный объект отдаёт форма строки.
+
+    Обычный виджет запрашивает подпись выбранного значения отдельным
+    запросом, то есть по запросу на каждую строку списка.
+    """
+
+    selected = None
+
+    def optgroups(self, name, value, attr=None):
+        if self.selected is None:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, self.selected.pk, self.choices.field.label_from_instance(
+                self.selected), True, len(options)))
+        return [(None, options, 0)]
+
+
+class PostChangeListForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.fields['group'].widget
+        widget = getattr(widget, 'widget', widget)
+        widget.selected = self.instance.group
+
+
+class MoveToGroupForm(forms.Form):
+    def __init__(self, *args, admin_site, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'] = forms.ModelChoiceField(
+            Group.objects.all(), required=False, label='Группа',
+            help_text='Оставьте пустым, чтобы убрать посты из группы.',
+            widget=AutocompleteSelect(
+                Post._meta.get_field('group').remote_field, admin_site))
+
+
+class PurgeCommentsForm(forms.Form):
+    pattern = forms.CharField(
+        label='Регулярное выражение',
+        help_text='Будут удалены все комментарии, текст которых под него '
+                  'подходит, вместе с ответами на них.')
+    # Выражение, число совпадений с которым модератор уже видел.
+    confirmed = forms.CharField(widget=forms.HiddenInput, required=False)
 
-from .models import Comment, Follow, Group, Post
+    def clean_pattern(self):
+        pattern = self.cleaned_data['pattern']
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            raise forms.ValidationError(f'Ошибка в выражении: {error}')
+        return pattern
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    paginator = AdminPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = ('purge_by_author', 'move_to_group')
+
+    def get_changelist(self, request, **kwargs):
+        return IndexedDateChangeList
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', RowAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using')))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            revisions.record_edit(form)
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            found = search_posts(queryset, search_term)
+            if found is not None:
+                return found, False
+        return super().get_search_results(request, queryset, search_term)
+
+    def purge_by_author(self, request, queryset):
+        author_ids = sorted(set(queryset.values_list('author_id', flat=True)))
+        task = moderation.purge_posts_by_authors.delay(author_ids)
+        message_task(self, request, task,
+                     f'Удаление всех постов авторов: {len(author_ids)}')
+    purge_by_author.short_description = 'Удалить все посты их авторов'
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(
+            request.POST if 'apply' in request.POST else None,
+            admin_site=self.admin_site)
+        if not form.is_valid():
+            return action_form(self, request, form, 'move_to_group',
+                               'Перенос постов в группу', 'Перенести')
+        group = form.cleaned_data['group']
+        post_ids = list(queryset.values_list('pk', flat=True))
+        task = moderation.move_posts.delay(
+            post_ids, group.pk if group else None)
+        message_task(self, request, task,
+                     f'Перенос постов в группу: {len(post_ids)}')
+    move_to_group.short_description = 'Перенести в группу'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post', 'parent')
+    search_fields = ('=author__username',)
+    paginator = AdminPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+    actions = ('purge_matching',)
+
+    def purge_matching(self, request, queryset):
+        title = 'Удаление похожих комментариев'
+        if 'apply' in request.POST:
+            form = PurgeCommentsForm(request.POST)
+        else:
+            # Выражение целиком совпадает с выбранными текстами, а не ищет
+            # их внутри: иначе короткое «ok» удалило бы всё, где оно есть.
+            form = PurgeCommentsForm(initial={'pattern': '^(?:{})$'.format(
+                '|'.join(re.escape(text) for text in
+                         queryset.values_list('text', flat=True)[:10]))})
+        if not form.is_valid():
+            return action_form(self, request, form, 'purge_matching', title,
+                               'Проверить')
+        pattern = form.cleaned_data['pattern']
+        if form.cleaned_data['confirmed'] != pattern:
+            matched = Comment.objects.filter(text__regex=pattern).count()
+            data = request.POST.copy()
+            data['confirmed'] = pattern
+            return action_form(
+                self, request, PurgeCommentsForm(data), 'purge_matching',
+                title, 'Удалить',
+                message=f'Под выражение подходит комментариев: {matched}. '
+                        f'Они будут удалены вместе с ответами.')
+        task = moderation.purge_comments.delay(pattern)
+        message_task(self, request, task, 'Удаление похожих комментариев')
+    purge_matching.short_description = 'Удалить все похожие комментарии'
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+    paginator = AdminPaginator
+    show_full_result_count = False
+
+
+class GroupSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'group')
+    list_select_related = ('user', 'group')
+    autocomplete_fields = ('user', 'group')
+    search_fields = ('=user__username', '=group__slug')
+    paginator = AdminPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(GroupSubscription, GroupSubscriptionAdmin)
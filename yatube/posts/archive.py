@@ -0,0 +1,65 @@
+"""Архив старых постов.
+
+Посты старше ``ARCHIVE_AFTER_DAYS`` вместе с комментариями и историей
+правок переносятся в таблицы ``ArchivedPost``, ``ArchivedComment`` и
+``ArchivedPostRevision`` с прежними id, а из рабочих таблиц удаляются.
+Ленты и их индексы остаются размером с окно свежих постов; старый пост
+по-прежнему открывается по своему адресу и виден в архиве профиля, но
+только для чтения и более медленным путём.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.purge import purge
+
+from .models import (ArchivedComment, ArchivedPost, ArchivedPostRevision,
+                     Comment, Post, PostRevision)
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'parent_id', 'text',
+                  'created', 'path', 'depth')
+REVISION_FIELDS = ('id', 'post_id', 'number', 'created', 'image',
+                   'is_snapshot', 'data')
+
+
+def horizon(days=None):
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def _copy(queryset, model, fields):
+    rows = queryset.values_list(*fields).iterator()
+    while True:
+        batch = list(islice(rows, settings.ARCHIVE_BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(
+            model(**dict(zip(fields, row))) for row in batch)
+
+
+def archive_before(border):
+    """Переносит в архив посты, опубликованные раньше ``border``.
+
+    Каждая пачка постов переносится в своей транзакции; возвращает число
+    перенесённых постов.
+    """
+    old = Post.objects.filter(pub_date__lt=border).order_by('pub_date')
+    moved = 0
+    while True:
+        with transaction.atomic():
+            ids = list(old.values_list('pk', flat=True)[
+                :settings.ARCHIVE_BATCH_SIZE])
+            if not ids:
+                return moved
+            _copy(Post.objects.filter(pk__in=ids), ArchivedPost, POST_FIELDS)
+            _copy(Comment.objects.filter(post_id__in=ids).order_by('path'),
+                  ArchivedComment, COMMENT_FIELDS)
+            _copy(PostRevision.objects.filter(post_id__in=ids),
+                  ArchivedPostRevision, REVISION_FIELDS)
+            purge(Post.objects.filter(pk__in=ids))
+        moved += len(ids)
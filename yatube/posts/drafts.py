@@ -0,0 +1,73 @@
+"""Черновики и отложенная публикация.
+
+Неопубликованные посты лежат в отдельной таблице ``Draft``, как и архив,
+а не в ``Post`` с флагом: ленты, поиск, счётчики и их индексы видят только
+опубликованное без лишнего условия в каждом запросе. Публикация — это
+создание ``Post`` из черновика: ``pub_date`` ставится в момент выхода, и
+сигналы создания поста — SSE, уведомления подписчиков, статистика групп
+и авторов — срабатывают ровно тогда, когда пост становится виден. Тогда же
+сбрасываются кэш главной страницы и закэшированные числа постов.
+
+Для запланированного черновика в очередь ``core.tasks`` ставится задача
+``publish_due`` на время ``publish_at``. Она публикует все наступившие
+черновики пачками по ``SCHEDULER_BATCH_SIZE``; задачи, оставшиеся после
+переноса или отмены, просто ничего не находят.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core import counts
+from core.tasks import task
+
+from .models import Draft, Post
+from .utils import forget_index_page
+
+
+def publish(draft):
+    """Публикует черновик; None, если его уже опубликовали или удалили."""
+    with transaction.atomic():
+        # Черновик удаляется до создания поста: второй публикующий
+        # не найдёт строку и не создаст дубль.
+        deleted, _ = Draft.objects.filter(pk=draft.pk).delete()
+        if not deleted:
+            return None
+        post = Post.objects.create(
+            author_id=draft.author_id,
+            text=draft.text,
+            group_id=draft.group_id,
+            image=draft.image.name,
+        )
+        went_live()
+        transaction.on_commit(went_live)
+    return post
+
+
+def went_live():
+    """Сбрасывает кэши, в которых должен появиться вышедший пост.
+
+    Вызывается сразу и ещё раз после коммита: страница, закэшированная
+    между ними, не переживёт публикацию.
+    """
+    forget_index_page()
+    counts.forget_model(Post)
+
+
+def schedule(draft):
+    if draft.publish_at is not None:
+        publish_due.schedule(draft.publish_at)
+
+
+@task
+def publish_due():
+    """Публикует черновики, время которых наступило."""
+    due = Draft.objects.filter(
+        publish_at__lte=timezone.now()).order_by('publish_at', 'pk')
+    published = 0
+    while True:
+        with transaction.atomic():
+            batch = list(due[:settings.SCHEDULER_BATCH_SIZE])
+            if not batch:
+                return published
+            for draft in batch:
+                published += publish(draft) is not None
@@ -0,0 +1,171 @@
+"""Общая лента: посты авторов из подписок и подписанных групп.
+
+Каждый источник — автор или группа — это поток постов по убыванию
+``(pub_date, id)``; он читается короткими пачками по индексу
+``(author, -pub_date)`` или ``(group, -pub_date)``. Потоки сливаются
+кучей, а не одним запросом с OR по всем источникам.
+
+Чтобы время ответа не росло с числом подписок, источник читается, только
+когда его последний пост может попасть на страницу. Время последнего
+поста группы берётся из ``GroupStats``, автора — из ``AuthorStats``.
+Это верхние границы: после удаления поста граница остаётся завышенной,
+и источник прочитается зря, но ни один пост не потеряется.
+"""
+import heapq
+from collections import deque
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import follow_graph, mutes
+from .models import AuthorStats, GroupStats, Mute, Post
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _key(post):
+    return (-post.pub_date.timestamp(), -post.pk)
+
+
+class Source:
+    """Поток постов одного источника от курсора ``before`` вглубь.
+
+    ``lookup`` — условие на посты источника, например
+    ``{'author_id': 1}``; выборка строится только при чтении. ``hide`` —
+    функция, которая убирает из выборки скрытые посты.
+    """
+
+    def __init__(self, lookup, bound, before=None, hide=None):
+        self.lookup = lookup
+        self.hide = hide
+        self.bound = bound if before is None else min(bound, before[0])
+        self.before = before
+        self.buffer = deque()
+        self.done = False
+
+    def fill(self, size):
+        posts = Post.objects.select_related('author', 'group').filter(
+            **self.lookup)
+        if self.hide is not None:
+            posts = self.hide(posts)
+        if self.before is not None:
+            pub_date, pk = self.before
+            # Без OR: так выборка остаётся одним диапазоном индекса.
+            posts = posts.filter(pub_date__lte=pub_date).exclude(
+                pub_date=pub_date, pk__gte=pk)
+        chunk = list(posts.order_by('-pub_date', '-pk')[:size])
+        self.buffer.extend(chunk)
+        self.done = len(chunk) < size
+        if chunk:
+            self.before = (chunk[-1].pub_date, chunk[-1].pk)
+
+
+def merge(sources, limit):
+    """Первые ``limit`` постов слияния источников без повторов.
+
+    Источник читается, когда его граница не ниже лучшего из уже
+    прочитанных постов; прочитанный до конца пачки — снова ждёт своей
+    очереди с границей по последнему посту.
+    """
+    waiting = [(-source.bound.timestamp(), n, source)
+               for n, source in enumerate(sources)]
+    heapq.heapify(waiting)
+    ready = []
+    posts = []
+    seen = set()
+    while len(posts) < limit:
+        while waiting and (not ready or waiting[0][0] <= ready[0][0][0]):
+            _, n, source = heapq.heappop(waiting)
+            source.fill(limit - len(posts))
+            if source.buffer:
+                heapq.heappush(ready, (_key(source.buffer[0]), n, source))
+        if not ready:
+            break
+        _, n, source = heapq.heappop(ready)
+        post = source.buffer.popleft()
+        if source.buffer:
+            heapq.heappush(ready, (_key(source.buffer[0]), n, source))
+        elif not source.done:
+            heapq.heappush(
+                waiting, (-post.pub_date.timestamp(), n, source))
+        if post.pk not in seen:
+            seen.add(post.pk)
+            posts.append(post)
+    return posts
+
+
+def sources(user, before=None):
+    """Источники ленты пользователя, у которых есть посты.
+
+    Скрытые авторы и группы в источники не попадают, а из остальных
+    потоков скрытое убирается условиями в самих запросах.
+    """
+    muted = mutes.rules(user.pk)
+    author_ids = [
+        author_id for author_id in follow_graph.following_ids(user.pk)
+        if not mutes.is_muted(muted.author_ids, author_id)
+    ]
+    authors = AuthorStats.objects.all()
+    if len(author_ids) <= settings.FOLLOW_GRAPH_MAX_IN:
+        authors = authors.filter(author_id__in=author_ids)
+    else:
+        authors = authors.filter(author__following__user=user).exclude(
+            author_id__in=Mute.objects.filter(
+                user=user, kind=Mute.AUTHOR).values('author'))
+    groups = GroupStats.objects.filter(
+        group__subscribers__user=user, last_post_at__isnull=False)
+    hide = None
+    if any(muted):
+        hide = partial(mutes.apply, user_id=user.pk, muted=muted)
+    return [
+        Source({'author_id': author_id}, last, before, hide)
+        for author_id, last in authors.values_list(
+            'author_id', 'last_post_at')
+    ] + [
+        Source({'group_id': group_id}, last, before, hide)
+        for group_id, last in groups.values_list('group_id', 'last_post_at')
+        if not mutes.is_muted(muted.group_ids, group_id)
+    ]
+
+
+def page(user, before=None):
+    """Страница ленты после курсора ``(pub_date, id)`` и курсор следующей."""
+    posts = merge(sources(user, before), settings.NUMBER_OF_POSTED + 1)
+    if len(posts) <= settings.NUMBER_OF_POSTED:
+        return posts, None
+    posts = posts[:settings.NUMBER_OF_POSTED]
+    return posts, dump_cursor(posts[-1])
+
+
+def dump_cursor(post):
+    """Курсор ``микросекунды_id``: не зависит от того, жив ли сам пост."""
+    return f'{(post.pub_date - EPOCH) // MICROSECOND}_{post.pk}'
+
+
+def load_cursor(value):
+    """``(pub_date, id)`` из курсора или ``None``, если курсор испорчен."""
+    micros, _, pk = value.partition('_')
+    if not micros.isdigit() or not pk.isdigit():
+        return None
+    return EPOCH + int(micros) * MICROSECOND, int(pk)
+
+
+def touch(author_id, pub_date):
+    """Поднимает время последнего поста автора до ``pub_date``."""
+    value = Value(pub_date, output_field=models.DateTimeField())
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        last_post_at=Greatest('last_post_at', value))
+    if not updated:
+        try:
+            with transaction.atomic():
+                AuthorStats.objects.create(
+                    author_id=author_id, last_post_at=pub_date)
+        except IntegrityError:
+            AuthorStats.objects.filter(author_id=author_id).update(
+                last_post_at=Greatest('last_post_at', value))
@@ -0,0 +1,162 @@
+"""Граф подписок в общем кэше.
+
+Для каждого пользователя хранятся отсортированные массивы id: на кого он
+подписан и кто подписан на него. Массивы собираются из ``Follow`` при
+первом обращении, а подписка и отписка после коммита правят их на месте:
+массив подписчиков популярного автора не собирается заново из-за каждого
+нового подписчика. Кэш должен быть общим для всех процессов и уметь
+атомарный ``add`` (``core.caches``).
+
+Сборка и правка массива идут под блокировкой на ``add``. Сборщик держит
+её от чтения базы до записи в кэш, поэтому правка, которая ждёт
+блокировку, применяется уже к собранному массиву и не теряется, даже если
+сборщик прочитал базу до коммита подписки.
+"""
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Follow, User
+
+FOLLOWING_KEY = 'follow-graph:following:{}'
+FOLLOWERS_KEY = 'follow-graph:followers:{}'
+LOCK_KEY = 'follow-graph:lock:{}'
+
+
+def _cache():
+    return caches[settings.FOLLOW_GRAPH_CACHE]
+
+
+def _load(key, **lookup):
+    cache = _cache()
+    ids = cache.get(key)
+    if ids is not None:
+        return ids
+    lock = LOCK_KEY.format(key)
+    locked = cache.add(lock, True, settings.FOLLOW_GRAPH_LOCK_SECONDS)
+    try:
+        column = 'user_id' if 'author_id' in lookup else 'author_id'
+        ids = array('I', sorted(Follow.objects.filter(
+            **lookup).values_list(column, flat=True)))
+        # Без блокировки массив идёт в ответ, но не в кэш: его может
+        # править другой процесс.
+        if locked:
+            cache.set(key, ids, settings.FOLLOW_GRAPH_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock)
+    return ids
+
+
+def _patch(key, values, present):
+    """Добавляет (``present``) или убирает ``values`` в массиве ``key``."""
+    cache = _cache()
+    lock = LOCK_KEY.format(key)
+    deadline = time.monotonic() + settings.FOLLOW_GRAPH_LOCK_SECONDS
+    while not cache.add(lock, True, settings.FOLLOW_GRAPH_LOCK_SECONDS):
+        if time.monotonic() > deadline:
+            cache.delete(key)
+            return
+        time.sleep(0.01)
+    try:
+        ids = cache.get(key)
+        if ids is None:
+            return
+        changed = False
+        for value in values:
+            index = bisect_left(ids, value)
+            found = index < len(ids) and ids[index] == value
+            if present and not found:
+                ids.insert(index, value)
+            elif found and not present:
+                del ids[index]
+            else:
+                continue
+            changed = True
+        if changed:
+            cache.set(key, ids, settings.FOLLOW_GRAPH_TIMEOUT)
+    finally:
+        cache.delete(lock)
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _load(FOLLOWING_KEY.format(user_id), user_id=user_id)
+
+
+def follower_ids(author_id):
+    """Отсортированный массив id подписчиков автора."""
+    return _load(FOLLOWERS_KEY.format(author_id), author_id=author_id)
+
+
+def is_following(user_id, author_id):
+    return _contains(following_ids(user_id), author_id)
+
+
+def followed_among(user_id, author_ids):
+    """Те из author_ids, на кого подписан user_id, — одним чтением кэша."""
+    ids = following_ids(user_id)
+    return {author_id for author_id in set(author_ids)
+            if _contains(ids, author_id)}
+
+
+def _apply(user_id, author_ids, present):
+    _patch(FOLLOWING_KEY.format(user_id), author_ids, present)
+    for author_id in author_ids:
+        _patch(FOLLOWERS_KEY.format(author_id), (user_id,), present)
+
+
+def _change(user_id, author_ids, present):
+    """Вносит в граф подписки (или отписки) user_id от author_ids.
+
+    Массивы правятся после коммита, чтобы откаченная подписка не попала в
+    граф. Массив подписок самого пользователя невелик и удаляется ещё и
+    сразу: его следующий запрос увидит изменение и до коммита.
+    """
+    author_ids = sorted(set(author_ids))
+    _cache().delete(FOLLOWING_KEY.format(user_id))
+    transaction.on_commit(lambda: _apply(user_id, author_ids, present))
+
+
+def add_edges(user_id, author_ids):
+    _change(user_id, author_ids, True)
+
+
+def remove_edges(user_id, author_ids):
+    _change(user_id, author_ids, False)
+
+
+def follow_usernames(user, usernames):
+    """Подписывает на авторов по списку логинов.
+
+    Логины разрешаются одним запросом, подписки создаются одной вставкой;
+    уже существующие пропускает ограничение ``unique_follow``. Сигналы
+    при bulk_create не отправляются, поэтому граф правится здесь.
+    """
+    author_ids = list(User.objects.filter(
+        username__in=usernames).exclude(pk=user.pk).values_list(
+        'pk', flat=True))
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=author_id) for author_id in author_ids],
+        ignore_conflicts=True)
+    add_edges(user.pk, author_ids)
+    return author_ids
+
+
+def unfollow_usernames(user, usernames):
+    """Отписывает от авторов по списку логинов.
+
+    Граф правят сигналы post_delete удаляемых подписок.
+    """
+    deleted, _ = Follow.objects.filter(
+        user=user, author__username__in=usernames).delete()
+    return deleted
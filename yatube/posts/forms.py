@@ -1,6 +1,12 @@
+import csv
+import io
+import json
+
 from django import forms
+from django.conf import settings
+from django.utils import timezone
 
-from .models import Comment, Post
+from .models import Comment, Draft, Post
 
 
 class PostForm(forms.ModelForm):
@@ -14,6 +20,32 @@ class PostForm(forms.ModelForm):
         }
 
 
+class DraftForm(forms.ModelForm):
+    publish_at = forms.DateTimeField(
+        label='Опубликовать',
+        help_text='Пусто — черновик, который не публикуется сам',
+        required=False,
+        input_formats=['%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'],
+        widget=forms.DateTimeInput(attrs={'type': 'datetime-local'},
+                                   format='%Y-%m-%dT%H:%M'),
+    )
+
+    class Meta:
+        model = Draft
+        fields = ('text', 'group', 'image', 'publish_at')
+        labels = {
+            'text': 'Текст поста',
+            'group': 'Группа',
+            'image': 'Картинка'
+        }
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at is not None and publish_at <= timezone.now():
+            raise forms.ValidationError('Это время уже прошло')
+        return publish_at
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
@@ -21,3 +53,63 @@ class CommentForm(forms.ModelForm):
         labels = {
             'text': 'Текст',
         }
+
+
+class MuteWordForm(forms.Form):
+    word = forms.CharField(
+        label='Слово или фраза',
+        help_text='Посты с ним не будут показываться в лентах',
+        max_length=100,
+    )
+
+    def clean_word(self):
+        return self.cleaned_data['word'].strip().lower()
+
+
+class FollowListForm(forms.Form):
+    usernames = forms.CharField(
+        label='Логины авторов',
+        help_text='По одному в строке или через запятую',
+        widget=forms.Textarea,
+    )
+
+    def clean_usernames(self):
+        usernames = {
+            name.strip()
+            for name in self.cleaned_data['usernames'].replace(
+                ',', '\n').splitlines()
+            if name.strip()
+        }
+        if len(usernames) > settings.FOLLOW_BULK_LIMIT:
+            raise forms.ValidationError(
+                f'Не больше {settings.FOLLOW_BULK_LIMIT} авторов за раз')
+        return sorted(usernames)
+
+
+class FollowImportForm(forms.Form):
+    file = forms.FileField(
+        label='Файл подписок',
+        help_text='CSV с логинами в первой колонке или JSON-список',
+    )
+
+    def clean_file(self):
+        try:
+            content = self.cleaned_data['file'].read().decode('utf-8-sig')
+            if self.cleaned_data['file'].name.endswith('.json'):
+                rows = json.loads(content)
+                usernames = {
+                    row['username'] if isinstance(row, dict) else row
+                    for row in rows
+                }
+            else:
+                usernames = {
+                    row[0] for row in csv.reader(io.StringIO(content))
+                    if row and row[0] != 'username'
+                }
+        except (ValueError, KeyError, TypeError):
+            raise forms.ValidationError('Не удалось разобрать файл')
+        usernames = {str(name).strip() for name in usernames} - {''}
+        if len(usernames) > settings.FOLLOW_BULK_LIMIT:
+            raise forms.ValidationError(
+                f'Не больше {settings.FOLLOW_BULK_LIMIT} авторов за раз')
+        return sorted(usernames)
@@ -0,0 +1,165 @@
+"""Статистика групп для каталога.
+
+Число постов, число авторов и время последнего поста каждой группы лежат
+в ``GroupStats`` и меняются вместе с постами, а не считаются агрегатами
+по ``Post`` на каждый запрос. Авторов группы считает ``GroupAuthor``:
+строка на пару группа—автор с числом его постов, поэтому новый пост
+обходится двумя короткими UPDATE. Учитываются посты рабочей таблицы:
+после архивации старые посты и их авторы из статистики уходят.
+
+``rebuild`` пересчитывает всё с нуля; его запускает команда
+``rebuild_group_stats``.
+"""
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Group, GroupAuthor, GroupStats, Post
+
+ORDERINGS = {
+    'posts': ('-posts_count', 'pk'),
+    'authors': ('-authors_count', 'pk'),
+    'recent': ('-last_post_at', 'pk'),
+}
+
+
+def directory(sort):
+    """Статистика групп для каталога в порядке ``sort`` из ORDERINGS."""
+    stats = GroupStats.objects.select_related('group').order_by(
+        *ORDERINGS[sort])
+    if sort == 'recent':
+        stats = stats.filter(last_post_at__isnull=False)
+    return stats
+
+
+def add(group_id, author_id, pub_date, count=1):
+    """Учитывает ``count`` постов автора в группе."""
+    existing = GroupAuthor.objects.filter(
+        group_id=group_id, author_id=author_id).update(
+        posts=F('posts') + count)
+    if not existing:
+        try:
+            with transaction.atomic():
+                GroupAuthor.objects.create(
+                    group_id=group_id, author_id=author_id, posts=count)
+        except IntegrityError:
+            existing = GroupAuthor.objects.filter(
+                group_id=group_id, author_id=author_id).update(
+                posts=F('posts') + count)
+    pub_date = Value(pub_date, output_field=models.DateTimeField())
+    updated = GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + count,
+        authors_count=F('authors_count') + (0 if existing else 1),
+        last_post_at=Coalesce(Greatest('last_post_at', pub_date), pub_date))
+    if not updated:
+        rebuild_group(group_id)
+
+
+def subtract(counts, exclude=None):
+    """Вычитает посты из статистики групп.
+
+    ``counts`` — число постов по парам (группа, автор). ``exclude`` —
+    выборка постов, которые ещё в таблице, но уже не должны учитываться
+    при поиске последнего поста группы.
+    """
+    per_group = Counter()
+    for (group_id, author_id), count in counts.items():
+        GroupAuthor.objects.filter(
+            group_id=group_id, author_id=author_id).update(
+            posts=F('posts') - count)
+        per_group[group_id] += count
+    GroupAuthor.objects.filter(
+        group_id__in=list(per_group), posts__lte=0).delete()
+    for group_id, count in per_group.items():
+        posts = Post.objects.filter(group_id=group_id)
+        if exclude is not None:
+            posts = posts.exclude(pk__in=exclude)
+        # Число авторов пересчитывается по GroupAuthor: при каскадном
+        # удалении пользователя его строки могут исчезнуть раньше постов.
+        GroupStats.objects.filter(group_id=group_id).update(
+            posts_count=F('posts_count') - count,
+            authors_count=Coalesce(Subquery(
+                GroupAuthor.objects.filter(group_id=OuterRef('pk'))
+                .order_by().values('group_id').annotate(n=Count('pk'))
+                .values('n')[:1]), 0),
+            last_post_at=Subquery(
+                posts.order_by('-pub_date').values('pub_date')[:1]))
+
+
+def post_counts(queryset):
+    """Число постов выборки по парам (группа, автор)."""
+    rows = queryset.filter(group__isnull=False).order_by().values(
+        'group_id', 'author_id').annotate(count=Count('pk'))
+    return {(row['group_id'], row['author_id']): row['count']
+            for row in rows}
+
+
+def forget(queryset):
+    """Убирает из статистики посты выборки перед их удалением."""
+    subtract(post_counts(queryset), exclude=queryset)
+
+
+def move(queryset, group_id):
+    """Переносит посты выборки в группу ``group_id`` вместе со статистикой."""
+    moving = queryset.exclude(group_id=group_id)
+    counts = post_counts(moving)
+    authors = list(moving.order_by().values('author_id').annotate(
+        count=Count('pk'), last=Max('pub_date')))
+    ids = list(moving.values_list('pk', flat=True))
+    Post.objects.filter(pk__in=ids).update(group_id=group_id)
+    subtract(counts)
+    if group_id is not None:
+        for row in authors:
+            add(group_id, row['author_id'], row['last'], row['count'])
+
+
+def rebuild_group(group_id):
+    """Пересчитывает статистику одной группы агрегатами по постам."""
+    posts = Post.objects.filter(group_id=group_id)
+    with transaction.atomic():
+        GroupAuthor.objects.filter(group_id=group_id).delete()
+        GroupAuthor.objects.bulk_create(
+            GroupAuthor(group_id=group_id, author_id=row['author_id'],
+                        posts=row['count'])
+            for row in posts.order_by().values('author_id').annotate(
+                count=Count('pk')))
+        totals = posts.aggregate(count=Count('pk'), last=Max('pub_date'))
+        GroupStats.objects.update_or_create(group_id=group_id, defaults={
+            'posts_count': totals['count'],
+            'authors_count': GroupAuthor.objects.filter(
+                group_id=group_id).count(),
+            'last_post_at': totals['last'],
+        })
+
+
+def rebuild():
+    """Пересчитывает статистику всех групп; возвращает число групп."""
+    batch_size = settings.GROUP_STATS_BATCH_SIZE
+    stats = {pk: GroupStats(group_id=pk, posts_count=0, authors_count=0)
+             for pk in Group.objects.values_list('pk', flat=True)}
+    rows = Post.objects.filter(group__isnull=False).order_by().values_list(
+        'group_id', 'author_id').annotate(
+        count=Count('pk'), last=Max('pub_date')).iterator()
+    with transaction.atomic():
+        GroupAuthor.objects.all().delete()
+        GroupStats.objects.all().delete()
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            GroupAuthor.objects.bulk_create(
+                GroupAuthor(group_id=group_id, author_id=author_id,
+                            posts=count)
+                for group_id, author_id, count, last in batch)
+            for group_id, author_id, count, last in batch:
+                group = stats[group_id]
+                group.posts_count += count
+                group.authors_count += 1
+                if group.last_post_at is None or last > group.last_post_at:
+                    group.last_post_at = last
+        GroupStats.objects.bulk_create(stats.values())
+    return len(stats)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_before, horizon
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архив.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Архивировать посты старше стольких дней; по умолчанию '
+                 'ARCHIVE_AFTER_DAYS.')
+
+    def handle(self, *args, **options):
+        moved = archive_before(horizon(options['days']))
+        self.stdout.write(f'В архив перенесено постов: {moved}')
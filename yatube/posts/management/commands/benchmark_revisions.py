@@ -0,0 +1,77 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post, User
+from posts.revisions import record
+
+WORDS = ('пост', 'текст', 'правка', 'группа', 'автор', 'комментарий',
+         'лента', 'подписка', 'картинка', 'история')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Замеряет, во сколько обходится запись версии при правке поста, '
+            'и сколько места занимает версия. Все изменения откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--edits', type=int, default=200,
+            help='Число правок на каждый размер текста.')
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[300, 3000, 30000],
+            help='Размеры текста поста в символах.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"символов":>9} {"правка, мс":>11} '
+                          f'{"с версией, мс":>14} {"накладные, мс":>14} '
+                          f'{"байт на версию":>15}')
+        try:
+            with transaction.atomic():
+                author = User.objects.create_user(username='benchmark-author')
+                for size in options['sizes']:
+                    self.measure(author, size, options['edits'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, author, size, edits):
+        rng = random.Random(size)
+        lines = self.text(rng, size).splitlines()
+        post = Post.objects.create(author=author, text='\n'.join(lines))
+        plain = with_revision = 0
+        stored = 0
+        for _ in range(edits):
+            lines[rng.randrange(len(lines))] = self.text(rng, 60)
+            text = '\n'.join(lines)
+            old_text, post.text = post.text, text
+            started = time.perf_counter()
+            post.save(update_fields=['text'])
+            plain += time.perf_counter() - started
+            post.text = old_text
+            post.save(update_fields=['text'])
+            post.text = text
+            started = time.perf_counter()
+            post.save(update_fields=['text'])
+            revision = record(post, old_text, '')
+            with_revision += time.perf_counter() - started
+            stored += len(revision.data)
+        self.stdout.write(
+            f'{size:>9} {plain / edits * 1000:>11.3f} '
+            f'{with_revision / edits * 1000:>14.3f} '
+            f'{(with_revision - plain) / edits * 1000:>14.3f} '
+            f'{stored / edits:>15.0f}')
+
+    def text(self, rng, size):
+        words = []
+        length = 0
+        while length < size:
+            word = rng.choice(WORDS)
+            words.append(word + ('\n' if rng.random() < 0.1 else ' '))
+            length += len(words[-1])
+        return ''.join(words).strip()
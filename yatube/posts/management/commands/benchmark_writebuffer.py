@@ -0,0 +1,72 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from core.writebuffer import buffer, write
+from posts.models import Comment, Post, User
+
+OWNER = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = ('Замеряет, сколько комментариев в секунду записывается в каждом '
+            'режиме WRITE_BUFFER_MODE при разном числе пишущих потоков. '
+            'Созданные данные удаляются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=2,
+            help='Длительность замера одной настройки.')
+        parser.add_argument(
+            '--writers', type=int, nargs='+', default=[1, 16, 48],
+            help='Число одновременно пишущих потоков.')
+        parser.add_argument(
+            '--modes', nargs='+', default=['sync', 'group', 'async'],
+            choices=('sync', 'group', 'async'),
+            help='Режимы буфера записи.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"потоков":>8}' + ''.join(
+            f'{mode:>10}' for mode in options['modes']) + '  (строк/с)')
+        author = User.objects.create_user(username='benchmark-writer')
+        try:
+            post = Post.objects.create(author=author, text='Замер')
+            for writers in options['writers']:
+                rates = [
+                    self.measure(post, mode, writers, options['seconds'])
+                    for mode in options['modes']
+                ]
+                self.stdout.write(f'{writers:>8}' + ''.join(
+                    f'{rate:>10.0f}' for rate in rates))
+        finally:
+            author.delete()
+
+    def measure(self, post, mode, writers, seconds):
+        """Записанных строк в секунду, включая сброс остатка буфера."""
+        before = Comment.objects.filter(post=post).count()
+        deadline = time.perf_counter() + seconds
+
+        def run():
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        write(Comment(post=post, author=post.author,
+                                      text='Комментарий'), owner=OWNER)
+                    except Exception:
+                        pass
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with override_settings(WRITE_BUFFER_MODE=mode):
+            threads = [threading.Thread(target=run) for _ in range(writers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            buffer.wait_for(OWNER)
+        elapsed = time.perf_counter() - started
+        return (Comment.objects.filter(post=post).count() - before) / elapsed
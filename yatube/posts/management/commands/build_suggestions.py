@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import build_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «кого почитать».'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов для расчёта весов.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько пользователей считать и записывать за раз.')
+
+    def handle(self, *args, **options):
+        users = build_suggestions(options['processes'],
+                                  options['batch_size'])
+        self.stdout.write(f'Рекомендации пересчитаны для {users} '
+                          f'пользователей')
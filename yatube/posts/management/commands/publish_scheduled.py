@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.drafts import publish_due
+
+
+class Command(BaseCommand):
+    help = ('Публикует черновики, время публикации которых наступило. '
+            'Обычно это делает задача очереди; команда — для cron и '
+            'восстановления после простоя воркера.')
+
+    def handle(self, *args, **options):
+        published = publish_due()
+        self.stdout.write(f'Опубликовано постов: {published}')
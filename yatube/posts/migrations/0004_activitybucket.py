@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа'), ('author', 'Автор')], max_length=10, verbose_name='Тип объекта')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('bucket', models.DateTimeField(db_index=True, verbose_name='Начало интервала')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='События')),
+            ],
+            options={
+                'verbose_name': 'Счётчик активности',
+                'verbose_name_plural': 'Счётчики активности',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='activitybucket',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'bucket'), name='unique_activity_bucket'),
+        ),
+    ]
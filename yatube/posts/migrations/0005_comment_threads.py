@@ -0,0 +1,62 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия posts.models.encode_path_step на момент миграции: ширина шага
+# COMMENT_PATH_STEP здесь зафиксирована.
+PATH_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+PATH_STEP = 7
+BATCH_SIZE = 500
+
+
+def encode_path_step(pk):
+    step = ''
+    while pk:
+        pk, digit = divmod(pk, len(PATH_ALPHABET))
+        step = PATH_ALPHABET[digit] + step
+    return step.rjust(PATH_STEP, '0')
+
+
+def fill_paths(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    last = 0
+    while True:
+        ids = list(Comment.objects.filter(pk__gt=last).order_by(
+            'pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return
+        Comment.objects.bulk_update(
+            [Comment(pk=pk, path=encode_path_step(pk)) for pk in ids],
+            ['path'])
+        last = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_activitybucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=56, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
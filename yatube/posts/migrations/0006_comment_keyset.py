@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'created', 'id'], name='posts_comme_post_id_aa3f69_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert '
+    'AFTER INSERT ON posts_post BEGIN '
+    'INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete '
+    'AFTER DELETE ON posts_post BEGIN '
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS posts_post_fts_update '
+    'AFTER UPDATE OF text ON posts_post BEGIN '
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    'INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); '
+    'END',
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    'DROP TABLE IF EXISTS posts_post_fts',
+]
+POSTGRES_INSTALL = [
+    'CREATE INDEX IF NOT EXISTS posts_post_text_fts ON posts_post '
+    "USING gin (to_tsvector('russian', text))",
+]
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS posts_post_text_fts',
+]
+
+
+class VendorRunSQL(migrations.RunSQL):
+    """RunSQL, который выполняется только на СУБД ``vendor``."""
+
+    def __init__(self, vendor, sql, reverse_sql):
+        self.vendor = vendor
+        super().__init__(sql, reverse_sql)
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        return name, args, {'vendor': self.vendor, **kwargs}
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_notification'),
+    ]
+
+    operations = [
+        VendorRunSQL('sqlite', SQLITE_INSTALL, SQLITE_UNINSTALL),
+        VendorRunSQL('postgresql', POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    ]
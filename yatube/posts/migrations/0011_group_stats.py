@@ -0,0 +1,97 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:47
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    GroupAuthor = apps.get_model('posts', 'GroupAuthor')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    stats = {pk: GroupStats(group_id=pk, posts_count=0, authors_count=0)
+             for pk in Group.objects.values_list('pk', flat=True)}
+    rows = Post.objects.filter(group__isnull=False).order_by().values_list(
+        'group_id', 'author_id').annotate(
+        count=models.Count('pk'), last=models.Max('pub_date')).iterator()
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        GroupAuthor.objects.bulk_create(
+            GroupAuthor(group_id=group_id, author_id=author_id, posts=count)
+            for group_id, author_id, count, last in batch)
+        for group_id, author_id, count, last in batch:
+            group = stats[group_id]
+            group.posts_count += count
+            group.authors_count += 1
+            if group.last_post_at is None or last > group.last_post_at:
+                group.last_post_at = last
+    GroupStats.objects.bulk_create(stats.values(), batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_post_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts', models.PositiveIntegerField(verbose_name='Постов')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('authors_count', models.PositiveIntegerField(default=0, verbose_name='Авторов')),
+                ('last_post_at', models.DateTimeField(null=True, verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='posts_post_group_i_1fdac4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts_count', 'group'], name='posts_group_posts_c_2ba5f0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-authors_count', 'group'], name='posts_group_authors_8d285c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post_at', 'group'], name='posts_group_last_po_de73a3_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupauthor',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='groupauthor',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupauthor',
+            constraint=models.UniqueConstraint(fields=('group', 'author'), name='unique_group_author'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_group_subscription'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mute',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('author', 'Автор'), ('group', 'Группа'), ('word', 'Слово')], max_length=10, verbose_name='Тип')),
+                ('word', models.CharField(blank=True, max_length=100, verbose_name='Слово')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mutes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Скрытие',
+                'verbose_name_plural': 'Скрытия',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mute',
+            constraint=models.UniqueConstraint(condition=models.Q(kind='author'), fields=('user', 'author'), name='unique_author_mute'),
+        ),
+        migrations.AddConstraint(
+            model_name='mute',
+            constraint=models.UniqueConstraint(condition=models.Q(kind='group'), fields=('user', 'group'), name='unique_group_mute'),
+        ),
+        migrations.AddConstraint(
+            model_name='mute',
+            constraint=models.UniqueConstraint(condition=models.Q(kind='word'), fields=('user', 'word'), name='unique_word_mute'),
+        ),
+    ]
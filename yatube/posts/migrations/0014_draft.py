@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_mute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Draft',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Текст поста')),
+                ('image', models.ImageField(blank=True, upload_to='posts/', verbose_name='Картинка')),
+                ('publish_at', models.DateTimeField(blank=True, db_index=True, help_text='Пусто — черновик, который не публикуется сам', null=True, verbose_name='Опубликовать')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Изменён')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drafts', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='drafts', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Черновик',
+                'verbose_name_plural': 'Черновики',
+                'ordering': ('-updated',),
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_draft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPostRevision',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('created', models.DateTimeField(verbose_name='Заменена')),
+                ('image', models.CharField(blank=True, max_length=100, verbose_name='Картинка')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полный текст')),
+                ('data', models.BinaryField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.ArchivedPost')),
+            ],
+            options={
+                'ordering': ('-number',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedpostrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='unique_archived_post_revision'),
+        ),
+    ]
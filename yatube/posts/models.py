@@ -1,9 +1,20 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
+PATH_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def encode_path_step(pk):
+    """id в base36 фиксированной ширины COMMENT_PATH_STEP."""
+    step = ''
+    while pk:
+        pk, digit = divmod(pk, len(PATH_ALPHABET))
+        step = PATH_ALPHABET[digit] + step
+    return step.rjust(settings.COMMENT_PATH_STEP, '0')
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -42,6 +53,55 @@ class Post(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['author', '-pub_date']),
+            models.Index(fields=['group', '-pub_date']),
+        ]
+
+    def __str__(self):
+        return self.text[:settings.SLICE]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Группа и автор на момент загрузки: по ним сигналы поправляют
+        # статистику групп, если при сохранении они поменялись.
+        if 'group_id' in field_names and 'author_id' in field_names:
+            post._loaded_group = (post.group_id, post.author_id)
+        return post
+
+
+class Draft(models.Model):
+    """Неопубликованный пост: черновик или запланированный на publish_at."""
+
+    text = models.TextField('Текст поста')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='drafts',
+    )
+    group = models.ForeignKey(
+        Group,
+        verbose_name='Группа',
+        blank=True,
+        null=True,
+        related_name='drafts',
+        on_delete=models.SET_NULL,
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    publish_at = models.DateTimeField(
+        'Опубликовать',
+        help_text='Пусто — черновик, который не публикуется сам',
+        blank=True,
+        null=True,
+        db_index=True,
+    )
+    updated = models.DateTimeField('Изменён', auto_now=True)
+
+    class Meta:
+        ordering = ('-updated',)
+        verbose_name = 'Черновик'
+        verbose_name_plural = 'Черновики'
 
     def __str__(self):
         return self.text[:settings.SLICE]
@@ -59,10 +119,48 @@ class Comment(models.Model):
     )
     text = models.TextField('Текст', help_text='Текст нового комментария')
     created = models.DateTimeField(auto_now_add=True)
+    parent = models.ForeignKey(
+        'self',
+        verbose_name='Ответ на',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=settings.COMMENT_PATH_STEP * settings.COMMENT_MAX_DEPTH,
+        blank=True,
+        editable=False,
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Уровень вложенности', default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path']),
+            models.Index(fields=['post', 'depth', 'created', 'id']),
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # Путь — id всех предков фиксированной ширины, поэтому сортировка
+        # по нему выстраивает ветку, а ветка целиком — префиксный диапазон.
+        if self.parent_id and not self.pk:
+            if self.parent.depth + 1 >= settings.COMMENT_MAX_DEPTH:
+                self.parent = self.parent.parent
+            self.depth = self.parent.depth + 1
+        # Комментарий без пути выпал бы из ветки, поэтому вставка и
+        # запись пути проходят одной транзакцией.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.path:
+                prefix = self.parent.path if self.parent_id else ''
+                self.path = prefix + encode_path_step(self.pk)
+                Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -81,3 +179,345 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_follow')
         ]
+
+
+class GroupSubscription(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_subscriptions',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='subscribers',
+    )
+
+    class Meta:
+        verbose_name = 'Подписка на группу'
+        verbose_name_plural = 'Подписки на группы'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'group'],
+                                    name='unique_group_subscription')
+        ]
+
+
+class Mute(models.Model):
+    """Правило скрытия постов в лентах пользователя."""
+
+    AUTHOR = 'author'
+    GROUP = 'group'
+    WORD = 'word'
+    KINDS = (
+        (AUTHOR, 'Автор'),
+        (GROUP, 'Группа'),
+        (WORD, 'Слово'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mutes',
+    )
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+    )
+    word = models.CharField('Слово', max_length=100, blank=True)
+
+    class Meta:
+        verbose_name = 'Скрытие'
+        verbose_name_plural = 'Скрытия'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], condition=models.Q(kind='author'),
+                name='unique_author_mute'),
+            models.UniqueConstraint(
+                fields=['user', 'group'], condition=models.Q(kind='group'),
+                name='unique_group_mute'),
+            models.UniqueConstraint(
+                fields=['user', 'word'], condition=models.Q(kind='word'),
+                name='unique_word_mute'),
+        ]
+
+
+class Suggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+    )
+    score = models.FloatField('Вес')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_suggestion')
+        ]
+        indexes = [models.Index(fields=['user', '-score'])]
+
+
+class ActivityBucket(models.Model):
+    """Счётчик активности объекта за один интервал времени."""
+
+    POST = 'post'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    KINDS = (
+        (POST, 'Пост'),
+        (GROUP, 'Группа'),
+        (AUTHOR, 'Автор'),
+    )
+
+    kind = models.CharField('Тип объекта', max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField('id объекта')
+    bucket = models.DateTimeField('Начало интервала', db_index=True)
+    hits = models.PositiveIntegerField('События', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик активности'
+        verbose_name_plural = 'Счётчики активности'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'bucket'],
+                                    name='unique_activity_bucket')
+        ]
+
+
+class Notification(models.Model):
+    COMMENT = 'comment'
+    REPLY = 'reply'
+    POST = 'post'
+    KINDS = (
+        (COMMENT, 'Комментарий к посту'),
+        (REPLY, 'Ответ на комментарий'),
+        (POST, 'Новый пост автора'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(fields=['recipient', '-id']),
+            models.Index(fields=['recipient', 'is_read']),
+        ]
+
+
+class ArchivedPost(models.Model):
+    """Пост старше горизонта архивации; id остаётся прежним."""
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField()
+    pub_date = models.DateTimeField()
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        on_delete=models.SET_NULL,
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived = models.DateTimeField('В архиве с', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Пост в архиве'
+        verbose_name_plural = 'Посты в архиве'
+        indexes = [models.Index(fields=['author', '-pub_date'])]
+
+    def __str__(self):
+        return self.text[:settings.SLICE]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.TextField('Текст')
+    created = models.DateTimeField()
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=settings.COMMENT_PATH_STEP * settings.COMMENT_MAX_DEPTH,
+    )
+    depth = models.PositiveSmallIntegerField('Уровень вложенности')
+
+    class Meta:
+        indexes = [models.Index(fields=['post', 'path'])]
+
+    def __str__(self):
+        return self.text
+
+
+class PostRevision(models.Model):
+    """Прежняя версия поста.
+
+    Текст хранится сжатым: либо целиком, либо обратной дельтой от
+    следующей версии (см. ``posts.revisions``).
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер')
+    created = models.DateTimeField('Заменена', auto_now_add=True)
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    is_snapshot = models.BooleanField('Полный текст', default=False)
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ('-number',)
+        verbose_name = 'Версия поста'
+        verbose_name_plural = 'Версии поста'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'],
+                                    name='unique_post_revision')
+        ]
+
+
+class ArchivedPostRevision(models.Model):
+    """Версия поста, перенесённая в архив вместе с постом."""
+
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер')
+    created = models.DateTimeField('Заменена')
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    is_snapshot = models.BooleanField('Полный текст', default=False)
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ('-number',)
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'],
+                                    name='unique_archived_post_revision')
+        ]
+
+
+class GroupStats(models.Model):
+    """Статистика группы для каталога; поддерживается posts.group_stats."""
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    authors_count = models.PositiveIntegerField('Авторов', default=0)
+    last_post_at = models.DateTimeField('Последний пост', null=True)
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+        indexes = [
+            models.Index(fields=['-posts_count', 'group']),
+            models.Index(fields=['-authors_count', 'group']),
+            models.Index(fields=['-last_post_at', 'group']),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Время последнего поста автора — верхняя граница для posts.feed."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+    )
+    last_post_at = models.DateTimeField('Последний пост')
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class GroupAuthor(models.Model):
+    """Число постов автора в группе — по нему считаются авторы группы."""
+
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    posts = models.PositiveIntegerField('Постов')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'author'],
+                                    name='unique_group_author')
+        ]
@@ -0,0 +1,60 @@
+"""Массовая модерация: фоновые задачи для действий админки.
+
+Задачи обрабатывают объекты пачками по ``PURGE_CHUNK_SIZE``, каждую в
+своей транзакции, и сохраняют прогресс в задаче очереди. Удаление идёт
+через ``core.purge`` без построчного каскада, а кэши, которые обычно
+поддерживают сигналы моделей, сбрасываются по ``pre_purge``.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from core.purge import purge_in_chunks
+from core.tasks import report_progress, task
+
+from . import group_stats
+from .models import Comment, Post, User
+
+
+class Progress:
+    def __init__(self, total):
+        self.done = 0
+        report_progress(0, total)
+
+    def __call__(self, count):
+        self.done += count
+        report_progress(self.done)
+
+
+@task
+def purge_users(user_ids):
+    """Удаляет пользователей со всеми постами, комментариями и подписками."""
+    posts = Post.objects.filter(author_id__in=user_ids)
+    comments = Comment.objects.filter(author_id__in=user_ids)
+    users = User.objects.filter(pk__in=user_ids)
+    progress = Progress(posts.count() + comments.count() + users.count())
+    for queryset in (posts, comments, users):
+        purge_in_chunks(queryset, progress)
+
+
+@task
+def purge_posts_by_authors(author_ids):
+    posts = Post.objects.filter(author_id__in=author_ids)
+    purge_in_chunks(posts, Progress(posts.count()))
+
+
+@task
+def purge_comments(pattern):
+    """Удаляет комментарии, текст которых подходит под регулярное выражение."""
+    comments = Comment.objects.filter(text__regex=pattern)
+    purge_in_chunks(comments, Progress(comments.count()))
+
+
+@task
+def move_posts(post_ids, group_id):
+    post_ids = sorted(post_ids)
+    progress = Progress(len(post_ids))
+    for start in range(0, len(post_ids), settings.PURGE_CHUNK_SIZE):
+        chunk = post_ids[start:start + settings.PURGE_CHUNK_SIZE]
+        with transaction.atomic():
+            group_stats.move(Post.objects.filter(pk__in=chunk), group_id)
+        progress(len(chunk))
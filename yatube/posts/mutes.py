@@ -0,0 +1,93 @@
+"""Скрытие авторов, групп и слов в лентах.
+
+Правила пользователя лежат в общем кэше ``MUTES_CACHE`` одним объектом:
+отсортированные массивы id авторов и групп и кортеж слов. ``apply``
+добавляет их к индексной выборке ленты условиями исключения, поэтому
+страница сразу набирается целиком, без дочитывания после фильтрации в
+Python. Кэш сбрасывают сигналы модели ``Mute``.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Mute
+
+MUTES_KEY = 'mutes:{}'
+
+Rules = namedtuple('Rules', 'author_ids group_ids words')
+
+
+def _cache():
+    return caches[settings.MUTES_CACHE]
+
+
+def rules(user_id):
+    """Правила скрытия пользователя из кэша или из базы."""
+    key = MUTES_KEY.format(user_id)
+    cached = _cache().get(key)
+    if cached is not None:
+        return cached
+    author_ids, group_ids, words = [], [], []
+    for kind, author_id, group_id, word in Mute.objects.filter(
+            user_id=user_id).values_list('kind', 'author_id', 'group_id',
+                                         'word'):
+        if kind == Mute.AUTHOR:
+            author_ids.append(author_id)
+        elif kind == Mute.GROUP:
+            group_ids.append(group_id)
+        else:
+            words.append(word)
+    cached = Rules(array('I', sorted(author_ids)),
+                   array('I', sorted(group_ids)), tuple(sorted(words)))
+    _cache().set(key, cached, settings.MUTES_TIMEOUT)
+    return cached
+
+
+def forget(user_ids):
+    # Второй раз после коммита: другой процесс мог успеть закэшировать
+    # правила, прочитанные до него.
+    keys = [MUTES_KEY.format(user_id) for user_id in user_ids]
+    _cache().delete_many(keys)
+    transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def is_muted(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def words_pattern(words):
+    """Регулярное выражение, под которое подходит текст с любым из слов.
+
+    Слово ищется целиком: «кот» не скрывает пост со словом «который».
+    Границы записаны через ``\\W``, а не ``\\b``, который в PostgreSQL
+    означает другое.
+    """
+    return r'(^|\W)(' + '|'.join(
+        re.escape(word) for word in words) + r')(\W|$)'
+
+
+def _ids(user_id, kind, ids):
+    if len(ids) <= settings.MUTES_MAX_IN:
+        return list(ids)
+    return Mute.objects.filter(user_id=user_id, kind=kind).values(kind)
+
+
+def apply(posts, user_id, muted=None):
+    """Выборка постов без скрытых пользователем авторов, групп и слов."""
+    if muted is None:
+        muted = rules(user_id)
+    if muted.author_ids:
+        posts = posts.exclude(
+            author_id__in=_ids(user_id, Mute.AUTHOR, muted.author_ids))
+    if muted.group_ids:
+        posts = posts.exclude(
+            group_id__in=_ids(user_id, Mute.GROUP, muted.group_ids))
+    if muted.words:
+        posts = posts.exclude(text__iregex=words_pattern(muted.words))
+    return posts
@@ -0,0 +1,93 @@
+"""Уведомления о комментариях и новых постах.
+
+Уведомления создаются фоновыми задачами пакетными вставками. Число
+непрочитанных хранится в общем кэше ``NOTIFICATIONS_CACHE``, так что
+значок в шапке не делает COUNT на каждый запрос. Вставка и прочтение
+удаляют счётчик получателя, и следующее чтение считает его заново: кэш
+общий с воркером, но атомарного ``incr`` у файлового кэша нет.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.tasks import task
+
+from .models import Comment, Follow, Notification, Post
+
+UNREAD_KEY = 'notifications:unread:{}'
+
+
+def _cache():
+    return caches[settings.NOTIFICATIONS_CACHE]
+
+
+def unread_count(user_id):
+    key = UNREAD_KEY.format(user_id)
+    count = _cache().get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient_id=user_id, is_read=False).count()
+        _cache().set(key, count, settings.NOTIFICATIONS_COUNT_TIMEOUT)
+    return count
+
+
+def deliver(notifications):
+    """Сохраняет уведомления пачками и обновляет счётчики получателей."""
+    notifications = iter(notifications)
+    while True:
+        batch = list(islice(notifications, settings.NOTIFICATIONS_BATCH_SIZE))
+        if not batch:
+            return
+        Notification.objects.bulk_create(batch)
+        forget_unread(
+            {notification.recipient_id for notification in batch})
+
+
+@task
+def notify_comment(comment_id):
+    """Уведомляет автора поста и автора комментария, на который ответили."""
+    comment = Comment.objects.select_related(
+        'post', 'parent').filter(pk=comment_id).first()
+    if comment is None:
+        return
+    recipients = {comment.post.author_id: Notification.COMMENT}
+    if comment.parent_id:
+        recipients[comment.parent.author_id] = Notification.REPLY
+    recipients.pop(comment.author_id, None)
+    deliver([
+        Notification(recipient_id=recipient_id, actor_id=comment.author_id,
+                     kind=kind, post_id=comment.post_id, comment=comment)
+        for recipient_id, kind in recipients.items()
+    ])
+
+
+@task
+def notify_followers(post_id):
+    """Рассылает уведомление о новом посте всем подписчикам автора.
+
+    Подписчики читаются из ``Follow``, а не из графа в кэше: рассылка идёт
+    в воркере, и только что оформленная подписка должна в неё попасть.
+    """
+    post = Post.objects.filter(pk=post_id).only('author_id').first()
+    if post is None:
+        return
+    deliver(
+        Notification(recipient_id=follower_id, actor_id=post.author_id,
+                     kind=Notification.POST, post_id=post.pk)
+        for follower_id in Follow.objects.filter(
+            author_id=post.author_id).values_list(
+            'user_id', flat=True).iterator()
+    )
+
+
+def forget_unread(user_ids):
+    _cache().delete_many([UNREAD_KEY.format(pk) for pk in user_ids])
+
+
+def mark_read(user_id, notification_ids):
+    """Отмечает прочитанными показанные пользователю уведомления."""
+    Notification.objects.filter(
+        recipient_id=user_id, pk__in=notification_ids,
+        is_read=False).update(is_read=True)
+    forget_unread((user_id,))
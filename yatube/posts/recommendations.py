@@ -0,0 +1,133 @@
+"""Офлайн-расчёт рекомендаций «кого почитать».
+
+Граф подписок, комментариев и групп загружается из базы одним проходом в
+словари множеств, веса кандидатов считаются пакетами пользователей в пуле
+процессов, а топ-N для каждого пользователя записывается в ``Suggestion``.
+"""
+import heapq
+import multiprocessing
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import follow_graph
+from .models import Comment, Follow, Post, Suggestion
+
+_graph = None
+
+
+def load_graph():
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator():
+        following[user_id].add(author_id)
+    commented = defaultdict(set)
+    commenters = defaultdict(set)
+    for post_id, author_id in Comment.objects.values_list(
+            'post_id', 'author_id').iterator():
+        commented[author_id].add(post_id)
+        commenters[post_id].add(author_id)
+    groups = defaultdict(set)
+    group_authors = defaultdict(set)
+    for author_id, group_id in Post.objects.filter(
+            group__isnull=False).values_list(
+            'author_id', 'group_id').distinct().iterator():
+        groups[author_id].add(group_id)
+        group_authors[group_id].add(author_id)
+    return {
+        'following': following,
+        'commented': commented,
+        'commenters': {
+            post_id: authors for post_id, authors in commenters.items()
+            if len(authors) <= settings.SUGGESTION_MAX_POST_COMMENTERS
+        },
+        'groups': groups,
+        'group_authors': {
+            group_id: authors for group_id, authors in group_authors.items()
+            if len(authors) <= settings.SUGGESTION_MAX_GROUP_SIZE
+        },
+    }
+
+
+def score_user(graph, user_id):
+    """Топ-N кандидатов пользователя в виде пар ``(вес, id автора)``."""
+    weights = settings.SUGGESTION_WEIGHTS
+    scores = Counter()
+    followed = graph['following'].get(user_id, set())
+    for friend_id in followed:
+        for author_id in graph['following'].get(friend_id, ()):
+            scores[author_id] += weights['follows']
+    for post_id in graph['commented'].get(user_id, ()):
+        for author_id in graph['commenters'].get(post_id, ()):
+            scores[author_id] += weights['comments']
+    for group_id in graph['groups'].get(user_id, ()):
+        for author_id in graph['group_authors'].get(group_id, ()):
+            scores[author_id] += weights['groups']
+    for author_id in followed | {user_id}:
+        scores.pop(author_id, None)
+    return heapq.nlargest(
+        settings.SUGGESTIONS_PER_USER,
+        ((score, author_id) for author_id, score in scores.items()))
+
+
+def _init_worker(graph):
+    global _graph
+    _graph = graph
+
+
+def _score_batch(user_ids):
+    return [(user_id, score_user(_graph, user_id)) for user_id in user_ids]
+
+
+def _save_batch(results):
+    with transaction.atomic():
+        Suggestion.objects.filter(
+            user_id__in=[user_id for user_id, _ in results]).delete()
+        Suggestion.objects.bulk_create([
+            Suggestion(user_id=user_id, author_id=author_id, score=score)
+            for user_id, top in results
+            for score, author_id in top
+        ])
+
+
+def build_suggestions(processes=1, batch_size=500):
+    """Пересчитывает рекомендации всех активных пользователей."""
+    graph = load_graph()
+    user_ids = sorted(
+        set(graph['following']) | set(graph['commented'])
+        | set(graph['groups']))
+    batches = [user_ids[i:i + batch_size]
+               for i in range(0, len(user_ids), batch_size)]
+    if processes == 1:
+        _init_worker(graph)
+        for batch in map(_score_batch, batches):
+            _save_batch(batch)
+        return len(user_ids)
+    # Процессы наследуют граф через fork, а не копируют его через pickle.
+    connections.close_all()
+    with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(graph,)) as pool:
+        for batch in pool.map(_score_batch, batches):
+            _save_batch(batch)
+    return len(user_ids)
+
+
+def get_suggestions(user):
+    """Готовые рекомендации без авторов, на которых уже подписан."""
+    suggestions = Suggestion.objects.filter(user=user)
+    followed = follow_graph.following_ids(user.id)
+    if len(followed) <= settings.FOLLOW_GRAPH_MAX_IN:
+        suggestions = suggestions.exclude(author_id__in=list(followed))
+    else:
+        suggestions = suggestions.exclude(
+            author_id__in=Follow.objects.filter(user=user).values('author'))
+    return [
+        suggestion.author
+        for suggestion in suggestions.select_related('author').order_by(
+            '-score')[:settings.SUGGESTIONS_SHOWN]
+    ]
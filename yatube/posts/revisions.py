@@ -0,0 +1,110 @@
+"""История правок постов.
+
+Версия — текст и картинка поста до очередной правки. Текущая версия
+живёт в самом посте, поэтому прежние хранятся обратными дельтами:
+правка записывает, как из нового текста получить старый, и ей не нужно
+читать предыдущие версии. Каждая ``REVISION_SNAPSHOT_EVERY``-я версия
+хранится целиком, так что восстановление любой версии применяет не
+больше стольких дельт. Данные сжаты zlib.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import PostRevision
+
+RECORD_ATTEMPTS = 3
+
+
+def make_delta(base, target):
+    """Дельта по строкам: отрезки base, которые остались, и новый текст."""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    delta = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif j2 > j1:
+            delta.append(''.join(target_lines[j1:j2]))
+    return delta
+
+
+def apply_delta(base, delta):
+    lines = base.splitlines(keepends=True)
+    return ''.join(
+        ''.join(lines[part[0]:part[1]]) if isinstance(part, list) else part
+        for part in delta)
+
+
+def _pack(revision, base, text):
+    if revision.is_snapshot:
+        revision.data = zlib.compress(text.encode())
+    else:
+        revision.data = zlib.compress(json.dumps(
+            make_delta(base, text), ensure_ascii=False).encode())
+
+
+def _unpack(revision, base):
+    data = zlib.decompress(bytes(revision.data)).decode()
+    if revision.is_snapshot:
+        return data
+    return apply_delta(base, json.loads(data))
+
+
+def _next_number(post):
+    last = post.revisions.values_list('number', flat=True).first()
+    return (last or 0) + 1
+
+
+def record(post, text, image):
+    """Сохраняет версию поста до правки: прежние текст и картинку.
+
+    Номер версии — следующий за последним; если его успела занять
+    параллельная правка, номер берётся заново.
+    """
+    for attempt in range(RECORD_ATTEMPTS):
+        number = _next_number(post)
+        revision = PostRevision(
+            post=post,
+            number=number,
+            image=getattr(image, 'name', image) or '',
+            is_snapshot=number % settings.REVISION_SNAPSHOT_EVERY == 0,
+        )
+        _pack(revision, post.text, text)
+        try:
+            with transaction.atomic():
+                revision.save()
+        except IntegrityError:
+            if attempt == RECORD_ATTEMPTS - 1:
+                raise
+        else:
+            return revision
+
+
+def record_edit(form):
+    """Записывает версию, если сохранённая форма изменила текст или картинку.
+
+    Прежние значения берутся из ``form.initial``, поэтому лишнего чтения
+    из базы нет.
+    """
+    if not {'text', 'image'} & set(form.changed_data):
+        return None
+    return record(form.instance, form.initial.get('text', ''),
+                  form.initial.get('image'))
+
+
+def revision_text(revision):
+    """Текст версии: от ближайшего снимка или текущего текста по дельтам."""
+    every = settings.REVISION_SNAPSHOT_EVERY
+    snapshot = -(-revision.number // every) * every
+    chain = revision.post.revisions.filter(
+        number__gte=revision.number, number__lte=snapshot,
+    ).order_by('-number')
+    text = revision.post.text
+    for step in chain:
+        text = _unpack(step, text)
+    return text
@@ -0,0 +1,46 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite текст постов дублируется в виртуальную таблицу FTS5, которую
+поддерживают триггеры; в PostgreSQL строится GIN-индекс по
+``to_tsvector``. Таблицу, триггеры и индекс создаёт миграция 0008. Поиск
+возвращает id подходящих постов подзапросом, так что к выборке можно
+применять любые фильтры и сортировку. Для прочих СУБД индекса нет, и
+``search_posts`` возвращает None.
+
+SQLite удаляет триггеры, когда миграция пересоздаёт таблицу постов,
+поэтому такие миграции должны повторить SQL из 0008.
+"""
+from django.db import connections
+
+from .threads import RawSubquery
+
+SEARCH_SQL = {
+    'sqlite': (
+        'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s'),
+    'postgresql': (
+        'SELECT id FROM posts_post '
+        "WHERE to_tsvector('russian', text) @@ plainto_tsquery('russian', %s)"
+    ),
+}
+
+
+def _fts_query(term):
+    # Каждое слово — отдельная фраза с поиском по префиксу, так что
+    # операторы FTS5 в запросе пользователя не разбираются.
+    words = term.split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def search_posts(queryset, term):
+    """Выборка постов, в тексте которых есть все слова запроса.
+
+    Возвращает None, если у СУБД нет полнотекстового индекса.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor not in SEARCH_SQL:
+        return None
+    if vendor == 'sqlite':
+        term = _fts_query(term)
+    if not term.strip():
+        return queryset
+    return queryset.filter(pk__in=RawSubquery(SEARCH_SQL[vendor], [term]))
@@ -0,0 +1,120 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.pubsub import get_broker
+from core.purge import pre_purge
+
+from . import feed, follow_graph, group_stats, mutes, notifications, trending
+from .models import (ActivityBucket, Comment, Follow, Group, GroupStats, Mute,
+                     Notification, Post, User)
+
+NEW_POSTS_CHANNEL = 'posts'
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if not created:
+        return
+    if instance.group_id:
+        trending.record(ActivityBucket.GROUP, instance.group_id)
+    message = {'id': instance.pk, 'author': instance.author_id}
+    transaction.on_commit(
+        lambda: get_broker().publish(NEW_POSTS_CHANNEL, message))
+    transaction.on_commit(
+        lambda: notifications.notify_followers.delay(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def update_post_stats(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_group', None)
+    current = (instance.group_id, instance.author_id)
+    if not created and loaded in (None, current):
+        return
+    if created or loaded[1] != instance.author_id:
+        feed.touch(instance.author_id, instance.pub_date)
+    if loaded is not None and loaded[0] is not None:
+        group_stats.subtract({loaded: 1})
+    if instance.group_id is not None:
+        group_stats.add(instance.group_id, instance.author_id,
+                        instance.pub_date)
+    instance._loaded_group = current
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    if instance.group_id is not None:
+        group_stats.subtract({(instance.group_id, instance.author_id): 1})
+
+
+@receiver(pre_purge, sender=Post)
+def uncount_purged_posts(sender, queryset, **kwargs):
+    group_stats.forget(queryset)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.create(group=instance)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow_edge(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.add_edges(instance.user_id, (instance.author_id,))
+        trending.record(ActivityBucket.AUTHOR, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_edge(sender, instance, **kwargs):
+    follow_graph.remove_edges(instance.user_id, (instance.author_id,))
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_activity(sender, instance, created, **kwargs):
+    if not created:
+        return
+    trending.record(ActivityBucket.POST, instance.post_id)
+    if instance.post.group_id:
+        trending.record(ActivityBucket.GROUP, instance.post.group_id)
+    transaction.on_commit(
+        lambda: notifications.notify_comment.delay(instance.pk))
+
+
+@receiver(post_save, sender=Mute)
+@receiver(post_delete, sender=Mute)
+def forget_mutes(sender, instance, **kwargs):
+    mutes.forget((instance.user_id,))
+
+
+@receiver(pre_purge, sender=Mute)
+def forget_purged_mutes(sender, queryset, **kwargs):
+    mutes.forget(set(queryset.values_list('user_id', flat=True)))
+
+
+@receiver(pre_purge, sender=Follow)
+def remove_purged_edges(sender, queryset, **kwargs):
+    edges = defaultdict(list)
+    for user_id, author_id in queryset.values_list('user_id', 'author_id'):
+        edges[user_id].append(author_id)
+    for user_id, author_ids in edges.items():
+        follow_graph.remove_edges(user_id, author_ids)
+
+
+@receiver(pre_purge, sender=Notification)
+def forget_purged_unread(sender, queryset, **kwargs):
+    recipients = set(queryset.filter(is_read=False).values_list(
+        'recipient_id', flat=True))
+    if recipients:
+        transaction.on_commit(
+            lambda: notifications.forget_unread(recipients))
+
+
+@receiver(pre_purge, sender=Post)
+@receiver(pre_purge, sender=User)
+def drop_purged_activity(sender, queryset, **kwargs):
+    kind = ActivityBucket.POST if sender is Post else ActivityBucket.AUTHOR
+    ActivityBucket.objects.filter(
+        kind=kind, object_id__in=queryset.values('pk')).delete()
@@ -0,0 +1,35 @@
+import json
+import time
+
+from django.conf import settings
+
+from core.pubsub import get_broker
+
+from .signals import NEW_POSTS_CHANNEL
+
+
+def new_posts_events(seq, authors=None):
+    """Поток server-sent events с числом новых постов.
+
+    ``authors`` ограничивает подсчёт постами этих авторов. Соединение
+    живёт не дольше ``STREAM_MAX_SECONDS``, после чего браузер
+    переподключается с заголовком Last-Event-ID.
+    """
+    broker = get_broker()
+    deadline = time.monotonic() + settings.STREAM_MAX_SECONDS
+    yield f'retry: {settings.STREAM_RETRY_MS}\n\n'
+    while True:
+        timeout = min(settings.STREAM_HEARTBEAT_SECONDS,
+                      deadline - time.monotonic())
+        if timeout <= 0:
+            return
+        events = broker.wait(NEW_POSTS_CHANNEL, seq, timeout)
+        if not events:
+            yield ': ping\n\n'
+            continue
+        seq = events[-1][0]
+        count = sum(1 for _, message in events
+                    if authors is None or message['author'] in authors)
+        if count:
+            data = json.dumps({'count': count})
+            yield f'id: {seq}\nevent: posts\ndata: {data}\n\n'
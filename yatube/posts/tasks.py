@@ -0,0 +1,17 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .models import Post
+
+POST_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+
+
+@task
+def warm_thumbnails(post_id):
+    """Готовит миниатюру поста заранее, а не при первом показе ленты."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    geometry, options = POST_THUMBNAIL
+    get_thumbnail(post.image, geometry, **options)
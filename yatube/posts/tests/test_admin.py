@@ -0,0 +1,92 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.author = User.objects.create_user(username='author')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def create_posts(self, count):
+        return [
+            Post.objects.create(author=self.author, group=self.groups[i % 3],
+                                text=f'Пост {i}')
+            for i in range(count)
+        ]
+
+    def changelist_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Число запросов списка постов не зависит от числа строк."""
+        self.create_posts(3)
+        self.changelist_queries()
+        few = self.changelist_queries()
+        self.create_posts(200)
+        cache.clear()
+        self.client.force_login(self.admin)
+        self.changelist_queries()
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_group_select_renders_only_selected_group(self):
+        """В строке списка нет полного списка групп."""
+        self.create_posts(1)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Группа 0')
+        self.assertNotContains(response, 'Группа 2')
+
+    def test_search_uses_full_text_index(self):
+        """Поиск находит посты по началу слов и видит правку текста."""
+        post = Post.objects.create(author=self.author, text='Рыжая кошка')
+        Post.objects.create(author=self.author, text='Чёрная собака')
+        response = self.client.get(self.url, {'q': 'кош рыж'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+        Post.objects.filter(pk=post.pk).update(text='Рыжая лиса')
+        response = self.client.get(self.url, {'q': 'кошка'})
+        self.assertFalse(response.context['cl'].result_list)
+        response = self.client.get(self.url, {'q': '"лиса'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+    def test_date_hierarchy_lists_existing_periods(self):
+        """Иерархия дат показывает только периоды, где есть посты."""
+        old, new = self.create_posts(2)
+        Post.objects.filter(pk=old.pk).update(pub_date=timezone.make_aware(
+            datetime.datetime(2020, 3, 15, 12)))
+        Post.objects.filter(pk=new.pk).update(pub_date=timezone.make_aware(
+            datetime.datetime(2021, 7, 1, 8)))
+        response = self.client.get(self.url)
+        self.assertContains(response, 'pub_date__year=2020')
+        self.assertContains(response, 'pub_date__year=2021')
+        response = self.client.get(self.url, {'pub_date__year': 2020})
+        self.assertEqual(list(response.context['cl'].result_list), [old])
+        self.assertContains(response, 'pub_date__month=3')
+        self.assertNotContains(response, 'pub_date__month=7')
+        response = self.client.get(
+            self.url, {'pub_date__year': 2020, 'pub_date__month': 3})
+        self.assertContains(response, 'pub_date__day=15')
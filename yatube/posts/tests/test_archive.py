@@ -0,0 +1,88 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import revisions
+from ..models import (ArchivedComment, ArchivedPost, ArchivedPostRevision,
+                      Comment, Post, PostRevision)
+
+User = get_user_model()
+
+
+@override_settings(ARCHIVE_AFTER_DAYS=30, ARCHIVE_BATCH_SIZE=2)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.old = [
+            Post.objects.create(author=cls.author, text=f'Старый {i}')
+            for i in range(3)
+        ]
+        Post.objects.filter(pk__in=[post.pk for post in cls.old]).update(
+            pub_date=timezone.now() - timedelta(days=60))
+        cls.new = Post.objects.create(author=cls.author, text='Свежий')
+        cls.root = Comment.objects.create(
+            post=cls.old[0], author=cls.author, text='Вопрос')
+        cls.reply = Comment.objects.create(
+            post=cls.old[0], author=cls.author, text='Ответ',
+            parent=cls.root)
+        revisions.record(cls.old[0], 'Первая редакция', '')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        call_command('archive_posts', stdout=StringIO())
+
+    def test_old_posts_move_with_comments(self):
+        """Старые посты с комментариями переносятся в архив с прежними id."""
+        self.assertEqual(list(Post.objects.all()), [self.new])
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old})
+        self.assertFalse(Comment.objects.exists())
+        reply = ArchivedComment.objects.get(pk=self.reply.pk)
+        self.assertEqual(reply.parent_id, self.root.pk)
+        self.assertEqual(reply.path, self.reply.path)
+
+    def test_revisions_move_with_post(self):
+        """История правок переносится в архив и по-прежнему читается."""
+        self.assertFalse(PostRevision.objects.exists())
+        revision = ArchivedPostRevision.objects.get()
+        self.assertEqual(revision.post_id, self.old[0].pk)
+        self.assertEqual(revisions.revision_text(revision),
+                         'Первая редакция')
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:post_history', args=(self.old[0].pk,)),
+            {'rev': 1})
+        self.assertEqual(response.context['revision_text'],
+                         'Первая редакция')
+
+    def test_archived_post_is_readable(self):
+        """Архивный пост открывается по старому адресу без формы ответа."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old[0].pk,)))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Ответ')
+        self.assertNotIn('form', response.context)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.new.pk + 100,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_profile_archive_toggle(self):
+        """Архив профиля показывает только архивные посты."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        response = self.client.get(url)
+        self.assertEqual(list(response.context['page_obj']), [self.new])
+        response = self.client.get(url, {'archive': '1'})
+        self.assertEqual(
+            {post.pk for post in response.context['page_obj']},
+            {post.pk for post in self.old})
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import run_pending
+
+from .. import drafts
+from ..forms import DraftForm
+from ..models import Draft, Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class DraftTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_create_page_saves_draft(self):
+        """Кнопка «В черновики» сохраняет черновик, а не пост."""
+        response = self.client.post(reverse('posts:create_post'), {
+            'text': 'Черновик', 'group': self.group.pk, 'draft': '1'})
+        draft = Draft.objects.get()
+        self.assertRedirects(
+            response, reverse('posts:draft_edit', args=(draft.pk,)))
+        self.assertFalse(Post.objects.exists())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 0)
+
+    def test_scheduled_draft_goes_live_on_time(self):
+        """Запланированный черновик публикует задача, когда придёт время."""
+        draft = Draft.objects.create(author=self.author, text='Позже',
+                                     group=self.group)
+        publish_at = timezone.now() + timedelta(hours=1)
+        self.client.post(reverse('posts:draft_edit', args=(draft.pk,)), {
+            'text': 'Позже', 'group': self.group.pk,
+            'publish_at': timezone.localtime(publish_at).strftime(
+                '%Y-%m-%dT%H:%M')})
+        task = Task.objects.get(name='posts.drafts.publish_due')
+        self.assertGreater(task.run_at, timezone.now())
+        run_pending()
+        self.assertFalse(Post.objects.exists())
+        Draft.objects.update(publish_at=timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        post = Post.objects.get()
+        self.assertEqual((post.text, post.group), ('Позже', self.group))
+        self.assertFalse(Draft.objects.exists())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 1)
+
+    def test_past_time_is_rejected(self):
+        """Нельзя запланировать публикацию на прошедшее время."""
+        draft = Draft.objects.create(author=self.author, text='Текст')
+        response = self.client.post(
+            reverse('posts:draft_edit', args=(draft.pk,)),
+            {'text': 'Текст', 'publish_at': '2000-01-01T10:00'})
+        self.assertTrue(response.context['form'].errors)
+
+    def test_publish_now_only_once(self):
+        """Черновик публикуется один раз, даже если его публикуют дважды."""
+        draft = Draft.objects.create(author=self.author, text='Сейчас')
+        response = self.client.post(
+            reverse('posts:draft_edit', args=(draft.pk,)),
+            {'text': 'Сейчас', 'publish': '1'})
+        post = Post.objects.get()
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(post.pk,)))
+        self.assertIsNone(drafts.publish(draft))
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_publishing_resets_index_and_counts(self):
+        """Вышедший пост сразу виден на закэшированной главной, а число
+        постов автора пересчитывается."""
+        post = Post.objects.create(author=self.author, text='Первый')
+        draft = Draft.objects.create(author=self.author, text='Запланирован')
+        detail = reverse('posts:post_detail', args=(post.pk,))
+        self.assertEqual(
+            self.client.get(detail).context['author_posts_count'], 1)
+        self.assertNotContains(self.client.get(reverse('posts:index')),
+                               'Запланирован')
+        drafts.publish(draft)
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            'Запланирован')
+        self.assertEqual(
+            self.client.get(detail).context['author_posts_count'], 2)
+
+    def test_publish_races_scheduler(self):
+        """Черновик, опубликованный задачей во время правки, не падает
+        и не воскресает."""
+        draft = Draft.objects.create(author=self.author, text='Гонка')
+        clean = DraftForm.clean
+
+        def clean_and_publish(form):
+            drafts.publish(draft)
+            return clean(form)
+
+        with mock.patch.object(DraftForm, 'clean', clean_and_publish):
+            response = self.client.post(
+                reverse('posts:draft_edit', args=(draft.pk,)),
+                {'text': 'Гонка', 'publish': '1'}, follow=True)
+        self.assertRedirects(response, reverse('posts:drafts'))
+        self.assertContains(response, 'уже опубликован или удалён')
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(Draft.objects.exists())
+
+    def test_delete_requires_post(self):
+        """Черновик удаляется только POST-запросом."""
+        draft = Draft.objects.create(author=self.author, text='Текст')
+        url = reverse('posts:draft_delete', args=(draft.pk,))
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertTrue(Draft.objects.exists())
+        self.client.post(url)
+        self.assertFalse(Draft.objects.exists())
+
+    def test_command_publishes_due_drafts(self):
+        """Команда публикует все наступившие черновики."""
+        past = timezone.now() - timedelta(minutes=1)
+        for i in range(3):
+            Draft.objects.create(author=self.author, text=f'Пост {i}',
+                                 publish_at=past)
+        Draft.objects.create(author=self.author, text='Черновик')
+        with self.settings(SCHEDULER_BATCH_SIZE=2):
+            call_command('publish_scheduled', stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(list(Draft.objects.values_list('text', flat=True)),
+                         ['Черновик'])
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import feed
+from ..models import AuthorStats, Follow, Group, GroupSubscription, Post
+
+User = get_user_model()
+
+
+@override_settings(NUMBER_OF_POSTED=3)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(2)
+        ]
+        now = timezone.now()
+        for i in range(12):
+            post = Post.objects.create(
+                author=cls.authors[i % 3], text=f'Пост {i}',
+                group=cls.groups[i % 2] if i % 4 else None)
+            # Посты парами с одинаковым временем: порядок решает id.
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(hours=12 - i // 2))
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+        GroupSubscription.objects.create(user=cls.user, group=cls.groups[1])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_pages_match_single_query(self):
+        """Слияние потоков даёт тот же порядок, что и запрос с OR."""
+        expected = list(Post.objects.filter(
+            Q(author=self.authors[0]) | Q(group=self.groups[1])
+        ).order_by('-pub_date', '-pk'))
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(reverse('posts:feed'), params)
+            seen += response.context['posts']
+            if response.context['next_cursor'] is None:
+                break
+            params = {'before': response.context['next_cursor']}
+        self.assertEqual(seen, expected)
+
+    def test_cursor_survives_deleted_post(self):
+        """Удаление поста из курсора не возвращает ленту в начало."""
+        url = reverse('posts:feed')
+        first = self.client.get(url)
+        cursor = first.context['next_cursor']
+        expected = self.client.get(url, {'before': cursor}).context['posts']
+        first.context['posts'][-1].delete()
+        cache.clear()
+        response = self.client.get(url, {'before': cursor})
+        self.assertEqual(response.context['posts'], expected)
+
+    def test_broken_cursor_opens_first_page(self):
+        response = self.client.get(reverse('posts:feed'), {'before': 'x_1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 3)
+
+    def test_inactive_sources_are_not_read(self):
+        """Источники без свежих постов не добавляют запросов."""
+        def queries():
+            with CaptureQueriesContext(connection) as captured:
+                feed.page(self.user)
+            return len(captured)
+
+        before = queries()
+        quiet = User.objects.create_user(username='quiet')
+        Post.objects.create(author=quiet, text='Давно')
+        day_ago = timezone.now() - timedelta(days=1)
+        Post.objects.filter(author=quiet).update(pub_date=day_ago)
+        AuthorStats.objects.filter(author=quiet).update(last_post_at=day_ago)
+        Follow.objects.create(user=self.user, author=quiet)
+        cache.clear()
+        self.assertEqual(queries(), before)
+
+    def test_group_subscription(self):
+        """Подписка на группу добавляет её посты в ленту."""
+        group = self.groups[0]
+        self.client.get(reverse('posts:group_subscribe', args=(group.slug,)))
+        self.assertTrue(GroupSubscription.objects.filter(
+            user=self.user, group=group).exists())
+        response = self.client.get(reverse('posts:group_list',
+                                           args=(group.slug,)))
+        self.assertTrue(response.context['subscribed'])
+        self.client.get(
+            reverse('posts:group_unsubscribe', args=(group.slug,)))
+        self.assertFalse(GroupSubscription.objects.filter(
+            user=self.user, group=group).exists())
@@ -0,0 +1,77 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class BulkFollowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(5)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def following(self):
+        return set(self.user.follower.values_list(
+            'author__username', flat=True))
+
+    def test_follow_usernames_in_two_queries(self):
+        """Логины разрешаются одним запросом, подписки — одной вставкой."""
+        follow_graph.following_ids(self.user.id)
+        with self.assertNumQueries(2):
+            follow_graph.follow_usernames(
+                self.user, ['author0', 'author1', 'author2', 'auth', 'nobody'])
+        self.assertEqual(self.following(), {'author0', 'author1', 'author2'})
+        self.assertTrue(follow_graph.is_following(self.user.id,
+                                                  self.authors[2].id))
+
+    def test_bulk_follow_and_unfollow_views(self):
+        """Подписка и отписка списком через формы."""
+        self.authorized_client.post(
+            reverse('posts:follow_bulk'),
+            {'follow-usernames': 'author1, author2\nauthor3'})
+        self.assertEqual(self.following(),
+                         {'author0', 'author1', 'author2', 'author3'})
+        self.authorized_client.post(
+            reverse('posts:unfollow_bulk'),
+            {'unfollow-usernames': 'author0\nauthor3'})
+        self.assertEqual(self.following(), {'author1', 'author2'})
+        self.assertFalse(follow_graph.is_following(self.user.id,
+                                                   self.authors[0].id))
+
+    def test_import_csv_and_json(self):
+        """Импорт подписок из CSV и JSON."""
+        files = (
+            SimpleUploadedFile('follows.csv', b'username\nauthor1\nauthor2\n'),
+            SimpleUploadedFile('follows.json', json.dumps(
+                [{'username': 'author3'}, 'author4']).encode()),
+        )
+        for uploaded in files:
+            self.authorized_client.post(reverse('posts:follow_import'),
+                                        {'file': uploaded})
+        self.assertEqual(self.following(), {
+            'author0', 'author1', 'author2', 'author3', 'author4'})
+
+    def test_import_binary_file(self):
+        """Файл не в UTF-8 — ошибка формы, а не падение."""
+        response = self.authorized_client.post(
+            reverse('posts:follow_import'),
+            {'file': SimpleUploadedFile('follows.csv', b'\xff\xfe\x00\x89')})
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'import_form', 'file',
+                             'Не удалось разобрать файл')
@@ -0,0 +1,122 @@
+import threading
+import time
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.core import checks
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_graph_is_loaded_once(self):
+        """Массив подписок читается из базы один раз."""
+        author = self.authors[0]
+        with self.assertNumQueries(1):
+            self.assertTrue(follow_graph.is_following(self.user.id,
+                                                      author.id))
+            self.assertFalse(follow_graph.is_following(
+                self.user.id, self.authors[1].id))
+            self.assertEqual(follow_graph.followed_among(
+                self.user.id, [a.id for a in self.authors]), {author.id})
+
+    def test_rollback_leaves_no_edge(self):
+        """Откаченная подписка не остаётся в графе."""
+        author = self.authors[2]
+        follow_graph.following_ids(self.user.id)
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                Follow.objects.create(user=self.user, author=author)
+                raise DatabaseError
+        self.assertFalse(follow_graph.is_following(self.user.id, author.id))
+
+    def test_follow_list_pages(self):
+        """Страницы подписчиков и подписок выводят пользователей."""
+        response = self.client.get(
+            reverse('posts:followers', args=(self.authors[0].username,)))
+        self.assertEqual(list(response.context['page_obj']), [self.user])
+        response = self.client.get(
+            reverse('posts:following', args=(self.user.username,)))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.authors[0]])
+
+
+class FollowGraphCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(username='author')
+
+    def test_commit_patches_cached_arrays(self):
+        """Подписка и отписка правят массивы на месте, а не сбрасывают их.
+        """
+        follow_graph.following_ids(self.user.id)
+        follow_graph.follower_ids(self.author.id)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertIn(self.user.id,
+                          follow_graph.follower_ids(self.author.id))
+        with self.assertNumQueries(1):
+            self.assertTrue(follow_graph.is_following(self.user.id,
+                                                      self.author.id))
+        follow.delete()
+        with self.assertNumQueries(0):
+            self.assertNotIn(self.user.id,
+                             follow_graph.follower_ids(self.author.id))
+        self.assertFalse(follow_graph.is_following(self.user.id,
+                                                   self.author.id))
+
+    def test_patch_waits_for_loader(self):
+        """Правка ждёт сборщика и применяется к собранному им массиву."""
+        key = follow_graph.FOLLOWERS_KEY.format(self.author.id)
+        lock = follow_graph.LOCK_KEY.format(key)
+        cache.add(lock, True)
+        patch = threading.Thread(target=follow_graph.add_edges,
+                                 args=(self.user.id, (self.author.id,)))
+        patch.start()
+        time.sleep(0.05)
+        # Сборщик прочитал базу до коммита подписки.
+        cache.set(key, array('I'))
+        cache.delete(lock)
+        patch.join()
+        self.assertEqual(list(follow_graph.follower_ids(self.author.id)),
+                         [self.user.id])
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_rejected(self):
+        """Граф подписок нельзя держать в кэше одного процесса."""
+        errors = checks.run_checks(tags=[checks.Tags.caches])
+        self.assertIn('core.E001', [error.id for error in errors])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/yatube-check'}})
+    def test_cache_without_atomic_incr_is_rejected(self):
+        """Файловый кэш Django без блокировок теряет приращения счётчиков.
+        """
+        errors = checks.run_checks(tags=[checks.Tags.caches])
+        self.assertIn('core.E001', [error.id for error in errors])
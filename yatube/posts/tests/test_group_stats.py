@@ -0,0 +1,139 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.purge import purge
+from core.tasks import run_pending
+
+from .. import group_stats, moderation
+from ..models import Group, GroupAuthor, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = Group.objects.create(title='Первая', slug='first')
+        cls.second = Group.objects.create(title='Вторая', slug='second')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def snapshot(self):
+        return (
+            sorted(GroupStats.objects.values_list(
+                'group_id', 'posts_count', 'authors_count', 'last_post_at')),
+            sorted(GroupAuthor.objects.values_list(
+                'group_id', 'author_id', 'posts')),
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        group_stats.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_new_posts_update_stats(self):
+        """Новые посты меняют число постов, авторов и время последнего."""
+        Post.objects.create(author=self.author, text='1', group=self.first)
+        post = Post.objects.create(author=self.other, text='2',
+                                   group=self.first)
+        Post.objects.create(author=self.other, text='3', group=self.first)
+        stats = GroupStats.objects.get(group=self.first)
+        self.assertEqual((stats.posts_count, stats.authors_count), (3, 2))
+        self.assertEqual(
+            stats.last_post_at,
+            Post.objects.filter(group=self.first).latest('pub_date').pub_date)
+        self.assertEqual(GroupStats.objects.get(group=self.second).posts_count,
+                         0)
+        post.delete()
+        self.assertMatchesRebuild()
+
+    def test_edit_moves_post_between_groups(self):
+        """Смена группы при правке переносит пост в статистике."""
+        Post.objects.create(author=self.author, text='1', group=self.first)
+        post = Post.objects.get(
+            pk=Post.objects.create(author=self.other, text='2',
+                                   group=self.first).pk)
+        post.group = self.second
+        post.save()
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.first).authors_count, 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.second).posts_count, 1)
+        self.assertMatchesRebuild()
+
+    def test_purge_move_and_archive_keep_stats(self):
+        """Массовые удаление, перенос и архивация сходятся с пересчётом."""
+        posts = [
+            Post.objects.create(author=author, text='Пост', group=group)
+            for author in (self.author, self.other)
+            for group in (self.first, self.second, None)
+        ]
+        moderation.move_posts.delay(
+            [posts[0].pk, posts[2].pk], self.second.pk)
+        run_pending()
+        self.assertMatchesRebuild()
+        purge(Post.objects.filter(author=self.other, group=self.second))
+        self.assertMatchesRebuild()
+        Post.objects.filter(pk=posts[1].pk).update(
+            pub_date=timezone.now() - timedelta(days=60))
+        with override_settings(ARCHIVE_AFTER_DAYS=30):
+            call_command('archive_posts', stdout=StringIO())
+        self.assertMatchesRebuild()
+        purge(User.objects.filter(pk=self.other.pk))
+        self.assertMatchesRebuild()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.first).authors_count, 0)
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(3)
+        ]
+        for count, group in enumerate(cls.groups):
+            for _ in range(count):
+                Post.objects.create(author=cls.author, text='Пост',
+                                    group=group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_directory_sorted_by_post_count(self):
+        """Каталог показывает группы по числу постов."""
+        response = self.client.get(reverse('posts:groups'))
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            self.groups[::-1])
+        response = self.client.get(reverse('posts:groups'),
+                                   {'sort': 'recent'})
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.groups[2], self.groups[1]])
+
+    def test_directory_does_not_aggregate_posts(self):
+        """Страница каталога не обращается к таблице постов."""
+        url = reverse('posts:groups')
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'sort': 'authors'})
+        self.assertContains(response, 'постов: 2')
+
+    def test_rebuild_command(self):
+        """Команда пересчёта восстанавливает испорченную статистику."""
+        GroupStats.objects.update(posts_count=100, last_post_at=None)
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.groups[2]).posts_count, 2)
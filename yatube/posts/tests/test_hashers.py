@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+
+from core.hashers import ScryptPasswordHasher
+
+User = get_user_model()
+
+
+class CheapScryptHasher(ScryptPasswordHasher):
+    work_factor = 2 ** 10
+
+
+class ScryptHasherTests(TestCase):
+    def test_encode_and_verify(self):
+        """Пароль проверяется по своему хешу и не проверяется по чужому."""
+        hasher = CheapScryptHasher()
+        encoded = hasher.encode('secret', hasher.salt())
+        self.assertTrue(encoded.startswith('scrypt$1024$'))
+        self.assertTrue(hasher.verify('secret', encoded))
+        self.assertFalse(hasher.verify('wrong', encoded))
+        self.assertFalse(hasher.must_update(encoded))
+        self.assertTrue(ScryptPasswordHasher().must_update(encoded))
+
+    @override_settings(PASSWORD_HASHERS=[
+        'posts.tests.test_hashers.CheapScryptHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_rehash_on_login(self):
+        """Старый хеш заменяется хешем основного хешера при входе."""
+        user = User.objects.create_user(username='auth')
+        user.password = make_password('secret', hasher='md5')
+        user.save()
+        self.assertTrue(self.client.login(username='auth',
+                                          password='secret'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertTrue(check_password('secret', user.password))
+
+    def test_default_hasher_keeps_existing_hashes(self):
+        """С настройками по умолчанию вход не перехеширует PBKDF2."""
+        user = User.objects.create_user(username='auth', password='secret')
+        encoded = user.password
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.client.login(username='auth',
+                                          password='secret'))
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
@@ -0,0 +1,117 @@
+import socketserver
+import threading
+
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.mail import QueuedEmailBackend
+from core.models import Task
+from core.tasks import run_pending
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и складывает их."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 localhost')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                self.reply('354 go on')
+                lines = []
+                while True:
+                    data = self.rfile.readline().decode()
+                    if data.rstrip('\r\n') == '.':
+                        break
+                    lines.append(data)
+                server.messages.append(''.join(lines))
+                self.reply('250 queued')
+            elif command == 'MAIL' and server.refuse:
+                server.refuse -= 1
+                self.reply('451 try later')
+            else:
+                self.reply('250 ok')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.refuse = 0
+
+
+class QueuedEmailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = SMTPServer()
+        threading.Thread(target=cls.server.serve_forever,
+                         daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        overrides = override_settings(
+            EMAIL_QUEUE_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=cls.server.server_address[1],
+        )
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+
+    def setUp(self):
+        self.server.messages.clear()
+        self.server.connections = 0
+
+    def send(self, count):
+        return QueuedEmailBackend().send_messages([
+            EmailMessage(f'Письмо {i}', 'Текст', 'from@example.com',
+                         [f'user{i}@example.com'])
+            for i in range(count)
+        ])
+
+    def test_batch_goes_over_one_connection(self):
+        """Пакет писем хранится в очереди задач и уходит через одно
+        SMTP-соединение."""
+        self.assertEqual(self.send(5), 5)
+        self.assertEqual(self.server.messages, [])
+        self.assertEqual(Task.objects.count(), 1)
+        run_pending()
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_failed_message_is_retried(self):
+        """Отклонённое сервером письмо ставится в очередь повторно."""
+        self.server.refuse = 1
+        self.send(2)
+        with self.assertLogs('core.mail', 'WARNING'):
+            run_pending()
+        self.assertEqual(len(self.server.messages), 1)
+        retry = Task.objects.get(status=Task.PENDING)
+        self.assertGreater(retry.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_html_alternative_survives_queue(self):
+        """Письмо с HTML-версией доходит целиком."""
+        message = EmailMultiAlternatives(
+            'Сброс пароля', 'Текст', 'from@example.com',
+            ['user@example.com'])
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        QueuedEmailBackend().send_messages([message])
+        run_pending()
+        self.assertIn('text/html', self.server.messages[0])
@@ -0,0 +1,149 @@
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Task
+from core.purge import purge
+from core.tasks import run_pending
+
+from .. import follow_graph, notifications
+from ..models import Comment, Follow, Group, Notification, Post
+
+User = get_user_model()
+
+
+class PurgeTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.spammer = User.objects.create_user(username='spammer')
+        self.user = User.objects.create_user(username='user')
+        self.post = Post.objects.create(author=self.spammer, text='Спам')
+        own = Post.objects.create(author=self.user, text='Пост')
+        root = Comment.objects.create(
+            post=own, author=self.user, text='Вопрос')
+        spam = Comment.objects.create(
+            post=own, author=self.spammer, text='Спам', parent=root)
+        Comment.objects.create(
+            post=own, author=self.user, text='Ответ на спам', parent=spam)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Под спамом')
+        Follow.objects.create(user=self.user, author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.user)
+        run_pending()
+
+    def test_purge_users_removes_dependents_and_caches(self):
+        """Удаление пользователя убирает его данные и сбрасывает кэши."""
+        self.assertIn(self.spammer.pk, follow_graph.following_ids(
+            self.user.pk))
+        unread = notifications.unread_count(self.user.pk)
+        self.assertGreater(unread, 0)
+        client = Client()
+        client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'pass'))
+        client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'purge_users',
+            helpers.ACTION_CHECKBOX_NAME: [self.spammer.pk],
+        })
+        run_pending()
+        self.assertFalse(User.objects.filter(pk=self.spammer.pk).exists())
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Вопрос'])
+        self.assertEqual(Post.objects.get().author, self.user)
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Notification.objects.filter(
+            actor=self.spammer).exists())
+        self.assertNotIn(self.spammer.pk, follow_graph.following_ids(
+            self.user.pk))
+        self.assertEqual(notifications.unread_count(self.user.pk),
+                         Notification.objects.filter(
+                             recipient=self.user, is_read=False).count())
+        task = Task.objects.get(name='posts.moderation.purge_users')
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual((task.progress, task.total), (3, 3))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Число запросов удаления не зависит от числа удаляемых строк."""
+        def queries(count):
+            author = User.objects.create_user(username=f'author{count}')
+            for i in range(count):
+                post = Post.objects.create(author=author, text='Пост')
+                Comment.objects.create(post=post, author=self.user, text='1')
+            with CaptureQueriesContext(connection) as captured:
+                purge(Post.objects.filter(author=author))
+            self.assertFalse(Post.objects.filter(author=author).exists())
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(20))
+
+
+class ModerationActionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_move_to_group_asks_for_group(self):
+        """Перенос в группу сначала показывает форму, затем ставит задачу."""
+        url = reverse('admin:posts_post_changelist')
+        data = {
+            'action': 'move_to_group',
+            helpers.ACTION_CHECKBOX_NAME: [self.post.pk],
+        }
+        response = self.client.post(url, data)
+        self.assertTemplateUsed(response, 'admin/action_form.html')
+        self.assertFalse(Task.objects.exists())
+        response = self.client.post(
+            url, {**data, 'group': self.group.pk, 'apply': 'Перенести'})
+        self.assertRedirects(response, url)
+        run_pending()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.group)
+
+    def test_purge_pattern_matches_whole_text(self):
+        """Подставленное выражение не задевает тексты, где выбранный
+        встречается лишь частью."""
+        selected = Comment.objects.create(post=self.post, author=self.author,
+                                          text='ok')
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='ok, спасибо')
+        response = self.client.post(
+            reverse('admin:posts_comment_changelist'), {
+                'action': 'purge_matching',
+                helpers.ACTION_CHECKBOX_NAME: [selected.pk],
+            })
+        pattern = response.context['form']['pattern'].value()
+        self.assertEqual(pattern, '^(?:ok)$')
+        self.assertEqual(list(Comment.objects.filter(
+            text__regex=pattern)), [selected])
+
+    def test_purge_matching_comments(self):
+        """Удаляются все комментарии, подходящие под выражение."""
+        for text in ('купи дёшево', 'КУПИ дёшево', 'хороший пост'):
+            Comment.objects.create(post=self.post, author=self.author,
+                                   text=text)
+        data = {
+            'action': 'purge_matching',
+            helpers.ACTION_CHECKBOX_NAME: [Comment.objects.first().pk],
+            'pattern': '(?i)^купи',
+            'apply': 'Проверить',
+        }
+        url = reverse('admin:posts_comment_changelist')
+        response = self.client.post(url, data)
+        self.assertContains(response, 'Под выражение подходит комментариев: 2')
+        self.assertFalse(Task.objects.exists())
+        self.client.post(url, {**data, 'confirmed': data['pattern']})
+        run_pending()
+        self.assertEqual(list(Comment.objects.values_list('text', flat=True)),
+                         ['хороший пост'])
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import mutes
+from ..models import Follow, Group, GroupSubscription, Mute, Post
+
+User = get_user_model()
+
+
+@override_settings(NUMBER_OF_POSTED=3)
+class MuteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.liked = User.objects.create_user(username='liked')
+        cls.noisy = User.objects.create_user(username='noisy')
+        cls.group = Group.objects.create(title='Шум', slug='noise')
+        for i in range(4):
+            Post.objects.create(author=cls.liked, text=f'Пост {i}')
+            Post.objects.create(author=cls.noisy, text=f'Шумный {i}')
+            Post.objects.create(author=cls.liked, text=f'В группе {i}',
+                                group=cls.group)
+            Post.objects.create(author=cls.liked, text=f'СПАМ {i}')
+        for author in (cls.liked, cls.noisy):
+            Follow.objects.create(user=cls.user, author=author)
+        GroupSubscription.objects.create(user=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def mute_everything(self):
+        self.client.get(reverse('posts:mute_author',
+                                args=(self.noisy.username,)))
+        self.client.get(reverse('posts:mute_group', args=(self.group.slug,)))
+        self.client.post(reverse('posts:mutes'), {'word': ' Спам '})
+
+    def test_rules_are_cached_and_reset(self):
+        """Правила читаются из кэша и сбрасываются при изменении."""
+        self.assertFalse(any(mutes.rules(self.user.pk)))
+        self.mute_everything()
+        mutes.rules(self.user.pk)
+        with self.assertNumQueries(0):
+            rules = mutes.rules(self.user.pk)
+        self.assertEqual(list(rules.author_ids), [self.noisy.pk])
+        self.assertEqual(list(rules.group_ids), [self.group.pk])
+        self.assertEqual(rules.words, ('спам',))
+        mute = Mute.objects.get(user=self.user, kind=Mute.AUTHOR)
+        self.client.get(reverse('posts:unmute', args=(mute.pk,)))
+        self.assertFalse(mutes.rules(self.user.pk).author_ids)
+
+    def test_follow_index_page_is_full(self):
+        """Лента подписок без скрытого и всё равно полная."""
+        self.mute_everything()
+        response = self.client.get(reverse('posts:follow_index'))
+        page = list(response.context['page_obj'])
+        self.assertEqual(len(page), 3)
+        self.assertTrue(all(post.text.startswith('Пост') for post in page))
+
+    def test_feed_hides_muted(self):
+        """Общая лента не показывает скрытых авторов, группы и слова."""
+        self.mute_everything()
+        response = self.client.get(reverse('posts:feed'))
+        posts = response.context['posts']
+        self.assertEqual(len(posts), 3)
+        self.assertTrue(all(post.text.startswith('Пост') for post in posts))
+        response = self.client.get(
+            reverse('posts:feed'),
+            {'before': response.context['next_cursor']})
+        self.assertEqual([post.text for post in response.context['posts']],
+                         ['Пост 0'])
+
+    def test_words_match_whole_words(self):
+        """Скрытое слово не скрывает слова, в которые оно входит."""
+        cat = Post.objects.create(author=self.liked, text='Мой кот.')
+        which = Post.objects.create(author=self.liked, text='Который час')
+        Mute.objects.create(user=self.user, kind=Mute.WORD, word='кот')
+        visible = mutes.apply(Post.objects.filter(pk__in=(cat.pk, which.pk)),
+                              self.user.pk)
+        self.assertEqual(list(visible), [which])
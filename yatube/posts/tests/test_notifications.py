@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+
+from ..follow_graph import follower_ids
+from ..models import Comment, Follow, Notification, Post
+from ..notifications import notify_comment, notify_followers, unread_count
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower{i}')
+            for i in range(3)
+        ]
+        Follow.objects.bulk_create([
+            Follow(user=follower, author=cls.author)
+            for follower in cls.followers
+        ])
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.followers[0])
+
+    @override_settings(NOTIFICATIONS_BATCH_SIZE=2)
+    def test_new_post_fans_out_to_followers(self):
+        """Подписчики получают уведомление о новом посте пачками."""
+        notify_followers(self.post.pk)
+        self.assertEqual(
+            set(Notification.objects.filter(
+                kind=Notification.POST).values_list(
+                'recipient_id', flat=True)),
+            {follower.pk for follower in self.followers})
+
+    def test_comment_and_reply(self):
+        """Автор поста и автор комментария получают уведомления."""
+        commenter = self.followers[1]
+        comment = Comment.objects.create(
+            post=self.post, author=commenter, text='комментарий')
+        reply = Comment.objects.create(
+            post=self.post, author=self.followers[2], text='ответ',
+            parent=comment)
+        notify_comment(comment.pk)
+        notify_comment(reply.pk)
+        self.assertEqual(
+            sorted(Notification.objects.values_list(
+                'recipient__username', 'kind')),
+            [('author', Notification.COMMENT),
+             ('author', Notification.COMMENT),
+             ('follower1', Notification.REPLY)])
+
+    def test_unread_counter_is_cached(self):
+        """Счётчик непрочитанных кэшируется и сбрасывается рассылкой
+        и прочтением."""
+        user = self.followers[0]
+        self.assertEqual(unread_count(user.pk), 0)
+        notify_followers(self.post.pk)
+        self.assertEqual(unread_count(user.pk), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(user.pk), 1)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['notifications']), 1)
+        self.assertEqual(unread_count(user.pk), 0)
+        self.assertFalse(Notification.objects.filter(
+            recipient=user, is_read=False).exists())
+
+    @override_settings(NOTIFICATIONS_PER_PAGE=2)
+    def test_only_shown_are_marked_read(self):
+        """Прочитанными становятся только показанные уведомления."""
+        for _ in range(3):
+            notify_followers(self.post.pk)
+        self.client.get(reverse('posts:notifications'))
+        self.assertEqual(unread_count(self.followers[0].pk), 1)
+
+    def test_new_follower_is_notified(self):
+        """Рассылка видит подписку, которой ещё нет в графе в кэше."""
+        follower_ids(self.author.pk)
+        newcomer = User.objects.create_user(username='newcomer')
+        Follow.objects.bulk_create([Follow(user=newcomer, author=self.author)])
+        notify_followers(self.post.pk)
+        self.assertTrue(Notification.objects.filter(
+            recipient=newcomer, kind=Notification.POST).exists())
+
+    @override_settings(NOTIFICATIONS_PER_PAGE=2)
+    def test_cursor_pages(self):
+        """Лента уведомлений листается курсором по id."""
+        for _ in range(3):
+            notify_followers(self.post.pk)
+        url = reverse('posts:notifications')
+        response = self.client.get(url)
+        next_cursor = response.context['next_cursor']
+        self.assertEqual(len(response.context['notifications']), 2)
+        response = self.client.get(url, {'before': next_cursor})
+        self.assertEqual(len(response.context['notifications']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+
+
+class NotificationSignalTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_signals_enqueue_tasks(self):
+        """Новые пост и комментарий ставят рассылку в очередь задач."""
+        author = User.objects.create_user(username='author')
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=author)
+        post = Post.objects.create(author=author, text='Тестовый')
+        Comment.objects.create(post=post, author=follower, text='текст')
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', flat=True)),
+            ['posts.notifications.notify_comment',
+             'posts.notifications.notify_followers'])
+        run_pending()
+        self.assertEqual(Notification.objects.count(), 2)
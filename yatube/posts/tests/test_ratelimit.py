@@ -0,0 +1,110 @@
+import threading
+import time
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import RATELIMIT_KEY, hit
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(RATELIMITS={
+    'comment': (2, 60), 'follow': (1, 60), 'follow_bulk': (3, 60)})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comments_over_limit_get_429(self):
+        """Лишние комментарии отклоняются с кодом 429 и Retry-After."""
+        url = reverse('posts:add_comment', args=(self.post.id,))
+        for _ in range(2):
+            response = self.authorized_client.post(url, {'text': 'текст'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(url, {'text': 'текст'})
+        self.assertEqual(response.status_code,
+                         HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_limits_are_per_user(self):
+        """Лимит одного пользователя не мешает другому."""
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code,
+                         HTTPStatus.TOO_MANY_REQUESTS)
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        response = other.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_bulk_follow_is_charged_per_name(self):
+        """Массовая подписка расходует лимит на каждый логин."""
+        for name in ('a1', 'a2', 'a3'):
+            User.objects.create_user(username=name)
+        url = reverse('posts:follow_bulk')
+        response = self.authorized_client.post(
+            url, {'follow-usernames': 'a1, a2'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(
+            url, {'follow-usernames': 'a3, author'})
+        self.assertEqual(response.status_code,
+                         HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 2)
+
+    def test_previous_window_is_weighted(self):
+        """Запросы прошлого интервала учитываются скользящим окном."""
+        window = int(time.time() // 3600)
+        cache.set(RATELIMIT_KEY.format('test', 'ip:1', window - 1), 10 ** 6)
+        self.assertGreater(hit('test', 'ip:1', 3, 3600), 0)
+        self.assertEqual(hit('test', 'ip:2', 3, 3600), 0)
+
+    def test_counter_keeps_its_period(self):
+        """Приращение не сокращает срок счётчика до срока кэша."""
+        hit('test', 'ip:1', 1000, 3600, cost=500)
+        hit('test', 'ip:1', 1000, 3600, cost=500)
+        window = int(time.time() // 3600)
+        key = RATELIMIT_KEY.format('test', 'ip:1', window)
+        self.assertEqual(cache.get(key), 1000)
+        with mock.patch('time.time', return_value=time.time() + 3000):
+            self.assertEqual(cache.get(key), 1000)
+        self.assertGreater(hit('test', 'ip:1', 1000, 3600), 0)
+
+    def test_concurrent_hits_are_counted(self):
+        """Параллельные запросы не теряют приращений счётчика."""
+        def worker():
+            for _ in range(25):
+                hit('test', 'ip:1', 10 ** 6, 3600)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        window = int(time.time() // 3600)
+        self.assertEqual(
+            cache.get(RATELIMIT_KEY.format('test', 'ip:1', window)), 200)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        """Выключенный лимит не ограничивает запросы."""
+        url = reverse('posts:add_comment', args=(self.post.id,))
+        for _ in range(3):
+            self.authorized_client.post(url, {'text': 'текст'})
+        self.assertEqual(Comment.objects.count(), 3)
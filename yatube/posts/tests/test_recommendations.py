@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, Suggestion
+
+User = get_user_model()
+
+
+class SuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.commenter = User.objects.create_user(username='commenter')
+        cls.neighbour = User.objects.create_user(username='neighbour')
+        group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.popular)
+        post = Post.objects.create(author=cls.friend, text='Пост')
+        Comment.objects.create(post=post, author=cls.user, text='1')
+        Comment.objects.create(post=post, author=cls.commenter, text='2')
+        Post.objects.create(author=cls.user, text='Свой', group=group)
+        Post.objects.create(author=cls.neighbour, text='Сосед', group=group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_build_suggestions(self):
+        """Рекомендации учитывают подписки друзей, комментарии и группы
+        и не предлагают уже отслеживаемых авторов."""
+        call_command('build_suggestions', stdout=StringIO())
+        suggested = list(Suggestion.objects.filter(
+            user=self.user).order_by('-score').values_list(
+            'author__username', flat=True))
+        self.assertEqual(suggested, ['popular', 'commenter', 'neighbour'])
+
+    @override_settings(SUGGESTION_MAX_POST_COMMENTERS=1)
+    def test_crowded_discussion_is_ignored(self):
+        """Пост с толпой комментаторов не даёт веса по комментариям."""
+        call_command('build_suggestions', stdout=StringIO())
+        suggested = Suggestion.objects.filter(
+            user=self.user).values_list('author__username', flat=True)
+        self.assertNotIn('commenter', suggested)
+        self.assertIn('popular', suggested)
+
+    def test_suggestions_on_follow_index(self):
+        """Рекомендации выводятся в ленте подписок."""
+        Suggestion.objects.create(user=self.user, author=self.popular,
+                                  score=1)
+        Suggestion.objects.create(user=self.user, author=self.friend,
+                                  score=2)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'], [self.popular])
+
+    @override_settings(SUGGESTIONS_SHOWN=2)
+    def test_followed_authors_do_not_shrink_suggestions(self):
+        """Отслеживаемые авторы не занимают места рекомендаций."""
+        for score, author in enumerate(
+                (self.neighbour, self.commenter, self.popular, self.friend)):
+            Suggestion.objects.create(user=self.user, author=author,
+                                      score=score)
+        Follow.objects.create(user=self.user, author=self.popular)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'],
+                         [self.commenter, self.neighbour])
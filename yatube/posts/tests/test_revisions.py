@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import revisions
+from ..models import Post, PostRevision
+from ..revisions import apply_delta, make_delta, revision_text
+
+User = get_user_model()
+
+
+@override_settings(REVISION_SNAPSHOT_EVERY=3)
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(author=self.author, text='Версия 0')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def edit(self, text):
+        self.author_client.post(
+            reverse('posts:post_edit', args=(self.post.id,)), {'text': text})
+
+    def test_delta_round_trip(self):
+        """Дельта восстанавливает текст с любыми правками строк."""
+        base = 'первая\nвторая\nтретья\n'
+        for target in ('', 'первая\nновая\nтретья', base + 'четвёртая',
+                       'вторая\n'):
+            self.assertEqual(apply_delta(base, make_delta(base, target)),
+                             target)
+
+    def test_every_version_is_restored(self):
+        """Каждая прежняя версия восстанавливается, снимки периодичны."""
+        texts = [f'Строка {i}\nобщий хвост' for i in range(1, 8)]
+        for text in texts:
+            self.edit(text)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, texts[-1])
+        history = ['Версия 0'] + texts[:-1]
+        revisions = PostRevision.objects.filter(post=self.post)
+        self.assertEqual(revisions.count(), len(history))
+        for revision in revisions:
+            self.assertEqual(revision_text(revision),
+                             history[revision.number - 1])
+            self.assertEqual(revision.is_snapshot, revision.number % 3 == 0)
+
+    def test_concurrent_edit_takes_next_number(self):
+        """Номер, занятый параллельной правкой, берётся заново."""
+        self.edit('Версия 1')
+        with mock.patch.object(revisions, '_next_number',
+                               side_effect=[1, 2]):
+            revision = revisions.record(self.post, 'Версия 1', '')
+        self.assertEqual(revision.number, 2)
+        self.assertEqual(PostRevision.objects.count(), 2)
+
+    def test_unchanged_text_is_not_recorded(self):
+        """Сохранение без изменений не создаёт версию."""
+        self.edit('Версия 0')
+        self.assertFalse(PostRevision.objects.exists())
+
+    def test_history_is_visible_to_author_only(self):
+        """Историю видит автор; остальных отправляет к посту."""
+        self.edit('Версия 1')
+        url = reverse('posts:post_history', args=(self.post.id,))
+        response = self.author_client.get(url, {'rev': 1})
+        self.assertEqual(response.context['revision_text'], 'Версия 0')
+        other_client = Client()
+        other_client.force_login(self.other)
+        response = other_client.get(url)
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.id,)))
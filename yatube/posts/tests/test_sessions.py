@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.backends import USER_KEY
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth',
+                                            password='password')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_user_is_loaded_from_cache(self):
+        """Сессия и пользователь читаются из кэша, а не из базы."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+            self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_saving_user_resets_cache(self):
+        """Смена пароля сбрасывает кэш и завершает сессию."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_hash_is_not_cached(self):
+        """В кэше нет хеша пароля, а пароль дочитывается по требованию."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        self.assertNotIn(self.user.password,
+                         repr(cache.get(USER_KEY.format(self.user.pk))))
+        response = self.authorized_client.get(url)
+        with self.assertNumQueries(1):
+            self.assertTrue(response.wsgi_request.user.check_password(
+                'password'))
+
+    def test_revoked_user_is_logged_out(self):
+        """Снятие is_active действует с первого же запроса."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_change_keeps_session(self):
+        """Своя смена пароля не завершает текущую сессию."""
+        self.authorized_client.get(reverse('about:author'))
+        response = self.authorized_client.post(
+            reverse('users:password_change'), {
+                'old_password': 'password',
+                'new_password1': 'Nov-parol-2024',
+                'new_password2': 'Nov-parol-2024',
+            })
+        self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.get(reverse('about:author'))
+        self.assertTrue(response.context['user'].is_authenticated)
@@ -0,0 +1,89 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.pubsub import CacheBroker, LocalBroker, get_broker
+
+from ..models import Follow, Post
+from ..signals import NEW_POSTS_CHANNEL
+
+User = get_user_model()
+
+
+class BrokerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_events_after_sequence(self):
+        """Брокеры отдают только события после переданного номера."""
+        for broker in (LocalBroker(size=3), CacheBroker(size=3)):
+            with self.subTest(broker=type(broker).__name__):
+                for number in range(5):
+                    broker.publish('test', number)
+                self.assertEqual(broker.last_seq('test'), 5)
+                self.assertEqual(broker.wait('test', 3, 0),
+                                 [(4, 3), (5, 4)])
+                self.assertEqual(broker.wait('test', 0, 0),
+                                 [(3, 2), (4, 3), (5, 4)])
+                self.assertEqual(broker.wait('test', 5, 0), [])
+
+
+@override_settings(STREAM_MAX_SECONDS=0.05, STREAM_HEARTBEAT_SECONDS=0.01)
+class StreamViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def read_counts(self, response):
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return [
+            json.loads(line[len('data: '):])['count']
+            for chunk in response.streaming_content
+            for line in chunk.decode().splitlines()
+            if line.startswith('data: ')
+        ]
+
+    def test_stream_counts_new_posts(self):
+        """Поток сообщает о числе новых постов."""
+        broker = get_broker()
+        seq = broker.last_seq(NEW_POSTS_CHANNEL)
+        for author in (self.author, self.stranger):
+            broker.publish(NEW_POSTS_CHANNEL, {'id': 1, 'author': author.pk})
+        url = reverse('posts:posts_stream')
+        response = self.client.get(url, {'since': seq})
+        self.assertEqual(self.read_counts(response), [2])
+        response = self.authorized_client.get(
+            url, {'since': seq, 'feed': 'follow'})
+        self.assertEqual(self.read_counts(response), [1])
+
+    def test_sequence_ahead_of_broker(self):
+        """Номер больше последнего не подвешивает поток."""
+        broker = get_broker()
+        seq = broker.last_seq(NEW_POSTS_CHANNEL)
+        response = self.client.get(reverse('posts:posts_stream'),
+                                   {'since': seq + 100})
+        broker.publish(NEW_POSTS_CHANNEL, {'id': 1, 'author': self.author.pk})
+        self.assertEqual(self.read_counts(response), [1])
+
+
+class NewPostSignalTests(TransactionTestCase):
+    def test_new_post_is_published(self):
+        """Создание поста публикует событие после коммита."""
+        author = User.objects.create_user(username='author')
+        broker = get_broker()
+        seq = broker.last_seq(NEW_POSTS_CHANNEL)
+        post = Post.objects.create(author=author, text='Новый пост')
+        post.save()
+        self.assertEqual(broker.wait(NEW_POSTS_CHANNEL, seq, 0), [
+            (seq + 1, {'id': post.pk, 'author': author.pk})])
@@ -0,0 +1,167 @@
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import metrics, requeue_expired, run_pending, task, work
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+CALLS = []
+
+
+@task(max_attempts=2)
+def flaky(value):
+    CALLS.append(value)
+    if value == 'fail':
+        raise ValueError(value)
+
+
+@task
+def outlive_lease():
+    """Задача, которую за время работы вернули в очередь по аренде."""
+    Task.objects.update(heartbeat=timezone.now() - timedelta(days=1))
+    requeue_expired()
+
+
+@task
+def long_running():
+    time.sleep(0.5)
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_delay_and_run(self):
+        """Задача из очереди выполняется воркером."""
+        flaky.delay('ok')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ['ok'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertEqual(metrics()[Task.DONE], 1)
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача откладывается и после лимита попыток
+        помечается ошибкой."""
+        queued = flaky.delay('fail')
+        run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.PENDING)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('ValueError', queued.last_error)
+        self.assertEqual(run_pending(), 0)
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    @override_settings(TASK_LEASE_SECONDS=60)
+    def test_lost_worker(self):
+        """Задача пропавшего воркера возвращается в очередь как попытка."""
+        queued = flaky.delay('ok')
+        stale = timezone.now() - timedelta(seconds=61)
+        Task.objects.update(status=Task.RUNNING, attempts=1,
+                            started=stale, heartbeat=stale)
+        self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(CALLS, ['ok'])
+        Task.objects.update(status=Task.RUNNING, heartbeat=stale)
+        self.assertEqual(run_pending(), 0)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+
+    @override_settings(TASK_LEASE_SECONDS=60)
+    def test_progress_extends_lease(self):
+        """Отметка прогресса не даёт забрать длинную задачу."""
+        queued = flaky.delay('ok')
+        Task.objects.update(
+            status=Task.RUNNING, attempts=1,
+            started=timezone.now() - timedelta(seconds=61),
+            heartbeat=timezone.now())
+        self.assertEqual(run_pending(), 0)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.RUNNING)
+
+    def test_finished_run_keeps_requeued_status(self):
+        """Запуск, потерявший аренду, не перезаписывает статус задачи."""
+        queued = outlive_lease.delay()
+        with self.assertLogs('core.tasks', 'WARNING'):
+            run_pending(1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.PENDING)
+        self.assertEqual(queued.last_error,
+                         'Воркер не завершил задачу вовремя')
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        """В синхронном режиме задача выполняется сразу."""
+        self.assertIsNone(flaky.delay('eager'))
+        self.assertEqual(CALLS, ['eager'])
+        self.assertFalse(Task.objects.exists())
+
+
+class HeartbeatTests(TransactionTestCase):
+    @override_settings(TASK_HEARTBEAT_SECONDS=0.1, TASK_LEASE_SECONDS=0.3)
+    def test_long_task_keeps_its_lease(self):
+        """Задача дольше аренды не уходит второму воркеру, пока первый жив.
+        """
+        queued = long_running.delay()
+        first = threading.Thread(target=work, args=(threading.Event(), True))
+        first.start()
+        time.sleep(0.4)
+        self.assertEqual(run_pending(), 0)
+        first.join()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(queued.attempts, 1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTaskTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_new_image_queues_thumbnail(self):
+        """Новая картинка поста ставит подготовку миниатюры в очередь."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        client = Client()
+        client.force_login(user)
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        uploaded = SimpleUploadedFile(
+            name='small.gif', content=small_gif, content_type='image/gif')
+        client.post(reverse('posts:post_edit', args=(post.id,)),
+                    {'text': 'Пост с картинкой', 'image': uploaded})
+        queued = Task.objects.get()
+        self.assertEqual(queued.name, 'posts.tasks.warm_thumbnails')
+        self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
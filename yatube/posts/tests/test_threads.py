@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..threads import load_threads, thread
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.other_post = Post.objects.create(author=cls.user, text='Другой')
+        cls.first = Comment.objects.create(
+            post=cls.post, author=cls.user, text='первый')
+        cls.reply = Comment.objects.create(
+            post=cls.post, author=cls.user, text='ответ', parent=cls.first)
+        cls.nested = Comment.objects.create(
+            post=cls.post, author=cls.user, text='вложенный',
+            parent=cls.reply)
+        cls.second = Comment.objects.create(
+            post=cls.post, author=cls.user, text='второй')
+        cls.late_reply = Comment.objects.create(
+            post=cls.post, author=cls.user, text='поздний', parent=cls.first)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_path_follows_ancestors(self):
+        """Путь ответа начинается с пути родителя."""
+        self.assertEqual(self.first.depth, 0)
+        self.assertEqual(self.nested.depth, 2)
+        self.assertTrue(self.nested.path.startswith(self.reply.path))
+        self.assertTrue(self.reply.path.startswith(self.first.path))
+
+    def test_thread_in_tree_order(self):
+        """Ветка читается одним запросом в порядке обхода дерева."""
+        with self.assertNumQueries(1):
+            comments = [comment.text for comment in thread(self.first)]
+        self.assertEqual(comments, ['первый', 'ответ', 'вложенный', 'поздний'])
+
+    def test_comment_without_path(self):
+        """Комментарий без пути не втягивает в себя весь пост."""
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='без пути')])
+        orphan = Comment.objects.get(text='без пути')
+        self.assertEqual([comment.text for comment in thread(orphan)],
+                         ['без пути'])
+        comments, _ = load_threads(self.post, threads=10, replies=10)
+        self.assertEqual(len(comments), 5)
+        self.assertNotIn(orphan, comments)
+
+    def test_failed_path_update_drops_comment(self):
+        """Без записи пути комментарий не сохраняется вовсе."""
+        with mock.patch.object(QuerySet, 'update',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Comment.objects.create(
+                    post=self.post, author=self.user, text='сбой')
+        self.assertFalse(Comment.objects.filter(text='сбой').exists())
+
+    def test_load_threads_limits_replies(self):
+        """Страница веток содержит первые ответы и признак продолжения."""
+        with self.assertNumQueries(1):
+            comments, next_cursor = load_threads(
+                self.post, threads=10, replies=1)
+            authors = [comment.author.username for comment in comments]
+        self.assertEqual([comment.text for comment in comments],
+                         ['первый', 'ответ', 'второй'])
+        self.assertEqual(set(authors), {'auth'})
+        self.assertTrue(comments[0].has_more)
+        self.assertFalse(comments[2].has_more)
+        self.assertIsNone(next_cursor)
+
+    def test_keyset_pages(self):
+        """Страницы веток идут по курсору без пропусков и повторов."""
+        comments, next_cursor = load_threads(
+            self.post, threads=1, replies=10)
+        self.assertEqual(len(comments), 4)
+        self.assertEqual(next_cursor, self.first.id)
+        with self.assertNumQueries(1):
+            comments, next_cursor = load_threads(
+                self.post, after=next_cursor, threads=1)
+        self.assertEqual(comments, [self.second])
+        self.assertIsNone(next_cursor)
+
+    def test_comments_fragment(self):
+        """Следующая порция веток отдаётся фрагментом HTML или JSON."""
+        url = reverse('posts:post_comments', args=(self.post.id,))
+        with self.settings(COMMENT_THREADS_SHOWN=1):
+            response = self.client.get(url)
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html')
+            self.assertContains(response, f'?after={self.first.id}')
+            response = self.client.get(
+                url, {'after': self.first.id, 'format': 'json'})
+        data = response.json()
+        self.assertEqual([comment['text'] for comment in data['comments']],
+                         ['второй'])
+        self.assertIsNone(data['next'])
+
+    @override_settings(COMMENT_MAX_DEPTH=3)
+    def test_depth_is_capped(self):
+        """Ответ глубже предела прикрепляется к предку родителя."""
+        deep = Comment.objects.create(
+            post=self.post, author=self.user, text='глубже',
+            parent=self.nested)
+        self.assertEqual(deep.parent, self.reply)
+        self.assertEqual(deep.depth, 2)
+
+    def test_add_reply(self):
+        """Ответ через форму сохраняется в ветке родителя."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            data={'text': 'ещё ответ', 'parent': self.second.id},
+        )
+        comment = Comment.objects.get(text='ещё ответ')
+        self.assertEqual(comment.parent, self.second)
+        self.assertTrue(comment.path.startswith(self.second.path))
+
+    def test_reply_to_other_post_is_ignored(self):
+        """Родитель из чужого поста не принимается."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.other_post.id,)),
+            data={'text': 'чужой', 'parent': self.first.id},
+        )
+        self.assertIsNone(Comment.objects.get(text='чужой').parent)
+
+    def test_thread_page(self):
+        """Страница ветки показывает все ответы корня."""
+        response = self.client.get(reverse(
+            'posts:comment_thread', args=(self.post.id, self.first.id)))
+        self.assertEqual(len(response.context['comments']), 4)
+        response = self.client.get(reverse(
+            'posts:comment_thread', args=(self.other_post.id, self.first.id)))
+        self.assertEqual(response.status_code, 404)
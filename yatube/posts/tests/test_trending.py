@@ -0,0 +1,120 @@
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import work
+
+from .. import trending
+from ..models import ActivityBucket, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.quiet = Group.objects.create(title='Тихая', slug='quiet')
+        cls.hot_post = Post.objects.create(
+            author=cls.author, text='Горячий', group=cls.group)
+        cls.cold_post = Post.objects.create(
+            author=cls.author, text='Холодный', group=cls.quiet)
+        for text in ('1', '2'):
+            Comment.objects.create(post=cls.hot_post, author=cls.user,
+                                   text=text)
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_activity_is_counted_in_buckets(self):
+        """События складываются в счётчики текущего интервала."""
+        bucket = ActivityBucket.objects.get(
+            kind=ActivityBucket.POST, object_id=self.hot_post.id)
+        self.assertEqual(bucket.hits, 2)
+        self.assertEqual(ActivityBucket.objects.get(
+            kind=ActivityBucket.GROUP, object_id=self.group.id).hits, 3)
+
+    def test_cold_cache_is_not_computed_in_request(self):
+        """Без рейтинга в кэше страница получает пустой список, а пересчёт
+        уходит в очередь задач один раз."""
+        with self.assertNumQueries(1):
+            self.assertEqual(trending.top_ids(ActivityBucket.POST), [])
+            self.assertEqual(trending.top_ids(ActivityBucket.GROUP), [])
+        self.assertEqual(Task.objects.filter(
+            name='posts.trending.refresh').count(), 1)
+
+    def test_trending_page(self):
+        """Страница популярного выводит посты и группы по весу."""
+        trending.refresh()
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.hot_post])
+        self.assertEqual(response.context['hot_groups'],
+                         [self.group, self.quiet])
+        self.assertEqual(response.context['rising_authors'], [self.author])
+
+    @override_settings(TRENDING_REFRESH_SECONDS=-1)
+    def test_stale_ranking_is_refreshed_in_background(self):
+        """Устаревший рейтинг отдаётся из кэша, а пересчёт уходит
+        в очередь задач."""
+        trending.refresh()
+        Comment.objects.create(post=self.cold_post, author=self.user,
+                               text='3')
+        with self.assertNumQueries(1):
+            self.assertEqual(trending.top_ids(ActivityBucket.POST),
+                             [self.hot_post.id])
+        self.assertTrue(Task.objects.filter(
+            name='posts.trending.refresh').exists())
+
+    def test_old_activity_decays(self):
+        """Старые события весят меньше новых."""
+        old = trending.bucket_start(timezone.now()) - timedelta(hours=24)
+        ActivityBucket.objects.create(kind=ActivityBucket.POST,
+                                      object_id=self.cold_post.id,
+                                      bucket=old, hits=3)
+        trending.refresh()
+        self.assertEqual(trending.top_ids(ActivityBucket.POST),
+                         [self.hot_post.id, self.cold_post.id])
+
+
+class TrendingWorkerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        author = User.objects.create_user(username='author')
+        self.hot_post = Post.objects.create(author=author, text='Горячий')
+        self.new_post = Post.objects.create(author=author, text='Новый')
+        Comment.objects.create(post=self.hot_post, author=self.user,
+                               text='1')
+
+    def run_worker(self):
+        worker = threading.Thread(target=work,
+                                  args=(threading.Event(), True))
+        worker.start()
+        worker.join()
+
+    @override_settings(TRENDING_REFRESH_SECONDS=-1)
+    def test_worker_refresh_reaches_readers(self):
+        """Рейтинг, пересчитанный воркером, видят страницы."""
+        self.assertEqual(trending.top_ids(ActivityBucket.POST), [])
+        self.run_worker()
+        self.assertEqual(trending.top_ids(ActivityBucket.POST),
+                         [self.hot_post.id])
+        for text in ('2', '3'):
+            Comment.objects.create(post=self.new_post, author=self.user,
+                                   text=text)
+        self.assertEqual(trending.top_ids(ActivityBucket.POST),
+                         [self.hot_post.id])
+        self.run_worker()
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+        self.assertEqual(trending.top_ids(ActivityBucket.POST),
+                         [self.new_post.id, self.hot_post.id])
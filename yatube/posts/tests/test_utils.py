@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.counts import REFRESH_LOCK_KEY, _count_key
+
+from ..models import Post
+from ..utils import ApproximatePaginator, UncountedPaginator, WindowPaginator
+
+User = get_user_model()
+
+
+@override_settings(PAGINATOR_ON_EACH_SIDE=2, PAGINATOR_ON_ENDS=1)
+class WindowPaginatorTests(TestCase):
+    def test_window_around_current_page(self):
+        """Окно содержит крайние страницы и соседей текущей."""
+        paginator = WindowPaginator(range(1000), 10)
+        window = list(paginator.get_elided_page_range(50))
+        self.assertEqual(window, [1, paginator.ELLIPSIS, 48, 49, 50, 51, 52,
+                                  paginator.ELLIPSIS, 100])
+
+    def test_small_range_is_not_elided(self):
+        """Короткий список страниц выводится целиком."""
+        paginator = WindowPaginator(range(50), 10)
+        self.assertEqual(list(paginator.get_elided_page_range(3)),
+                         [1, 2, 3, 4, 5])
+
+
+class UncountedPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}') for i in range(25)
+        ])
+
+    def test_page_without_count_query(self):
+        """Страница выбирается одним запросом, без COUNT(*)."""
+        paginator = UncountedPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(2)
+            self.assertEqual(len(page), 10)
+            self.assertTrue(page.has_next())
+            self.assertTrue(page.has_previous())
+
+    def test_last_page_and_out_of_range(self):
+        """Последняя страница не имеет следующей, лишние ведут на первую."""
+        paginator = UncountedPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(3)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.get_page(99).number, 1)
+
+
+@override_settings(COUNT_REFRESH_ASYNC=False)
+class ApproximatePaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}') for i in range(25)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        """Повторный подсчёт берётся из кэша без COUNT(*)."""
+        posts = self.user.posts.all()
+        self.assertEqual(ApproximatePaginator(posts, 10).count, 25)
+        Post.objects.create(author=self.user, text='Новый пост')
+        with self.assertNumQueries(0):
+            self.assertEqual(ApproximatePaginator(posts, 10).count, 25)
+
+    @override_settings(COUNT_CACHE_SECONDS=-1)
+    def test_stale_count_is_refreshed(self):
+        """Устаревшее число пересчитывается."""
+        posts = self.user.posts.all()
+        ApproximatePaginator(posts, 10).count
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(ApproximatePaginator(posts, 10).count, 26)
+
+    def test_estimate_is_corrected_by_page(self):
+        """Заниженная оценка уточняется по выбранной странице."""
+        posts = self.user.posts.all()
+        ApproximatePaginator(posts, 10).count
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Ещё пост {i}') for i in range(10)
+        ])
+        paginator = ApproximatePaginator(posts, 10)
+        page = paginator.get_page(4)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.count, 35)
+
+    def test_profile_marks_only_approximate_total(self):
+        """Профиль помечает «≈» только устаревшее число постов."""
+        url = reverse('posts:profile', args=(self.user.username,))
+        self.assertContains(self.client.get(url), 'Всего постов: 25<')
+        posts = self.user.posts.select_related('author', 'group')
+        with override_settings(COUNT_CACHE_SECONDS=60 * 60):
+            # Пересчёт уже идёт в другом процессе.
+            cache.add(REFRESH_LOCK_KEY.format(_count_key(posts)), True)
+        with override_settings(COUNT_CACHE_SECONDS=0):
+            self.assertContains(self.client.get(url), 'Всего постов: ≈25')
+
+    def test_exact_count_on_post_page(self):
+        """На странице поста число постов автора без «≈», если оно точное.
+        """
+        post = self.user.posts.first()
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertFalse(response.context['author_posts_approximate'])
+        self.assertContains(response, '<span >25</span>')
+
+    def test_last_page_count_is_exact(self):
+        """На последней странице число точное."""
+        paginator = ApproximatePaginator(self.user.posts.all(), 10)
+        with mock.patch('posts.utils.estimate_count',
+                        return_value=(40, False)):
+            paginator.get_page(3)
+        self.assertEqual(paginator.count, 25)
+        self.assertFalse(paginator.approximate)
@@ -10,7 +10,7 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..forms import PostForm
-from ..models import Follow, Group, Post
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -249,3 +249,50 @@ class CacheTests(TestCase):
         cache.clear()
         response_three = self.client.get(reverse('posts:index'))
         self.assertNotEqual(response_two.content, response_three.content)
+
+
+class QueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        """Число запросов страницы поста не зависит от числа
+        комментариев."""
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        Comment.objects.create(post=self.post, author=self.user, text='1')
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.author, text=str(i))
+            for i in range(10)
+        ])
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    def test_profile_following_flag(self):
+        """Профиль сообщает, подписан ли пользователь на автора."""
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertTrue(response.context['following'])
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertFalse(response.context['following'])
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.writebuffer import buffer, write
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(WRITE_BUFFER_FLUSH_SECONDS=0.05)
+class WriteBufferTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Тестовый')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @override_settings(WRITE_BUFFER_MODE='group')
+    def test_group_commit_is_durable_on_return(self):
+        """В режиме group запись зафиксирована к возврату из write."""
+        comment = write(Comment(post=self.post, author=self.user, text='1'))
+        self.assertIsNotNone(comment.pk)
+        self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
+        self.assertTrue(comment.path)
+        with self.assertRaises(IntegrityError):
+            write(Follow(user=self.user, author=self.author))
+            write(Follow(user=self.user, author=self.author))
+
+    @override_settings(WRITE_BUFFER_MODE='async')
+    def test_author_reads_own_writes(self):
+        """Автор видит свой комментарий сразу после отправки."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'в буфере'})
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(self.post.id,)))
+        self.assertContains(response, 'в буфере')
+        self.assertFalse(buffer.pending)
+
+    @override_settings(WRITE_BUFFER_MODE='async')
+    def test_failed_write_does_not_affect_batch(self):
+        """Ошибка одной записи не откатывает остальные записи пакета."""
+        Follow.objects.create(user=self.user, author=self.author)
+        with self.assertLogs('core.writebuffer', 'ERROR'):
+            write(Follow(user=self.user, author=self.author), owner=1)
+            write(Comment(post=self.post, author=self.user, text='2'),
+                  owner=1)
+            buffer.wait_for(1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertTrue(Comment.objects.filter(text='2').exists())
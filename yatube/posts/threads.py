@@ -0,0 +1,96 @@
+"""Загрузка веток комментариев.
+
+У каждого комментария есть материализованный путь ``path`` — id всех
+предков фиксированной ширины. Ветка целиком — диапазон путей
+``[path, path + '~')`` внутри поста, поэтому она читается одним проходом
+по индексу ``(post, path)`` без рекурсивных запросов.
+"""
+from django.conf import settings
+from django.db.models import Q, Subquery
+from django.db.models.expressions import RawSQL
+
+from .models import Comment
+
+# Больше любой цифры base36, поэтому закрывает диапазон потомков.
+PATH_END = '~'
+
+THREADS_SQL = '''SELECT id FROM (
+    SELECT c.id, ROW_NUMBER() OVER (
+        PARTITION BY r.path ORDER BY c.path) AS position
+    FROM ({roots}) r
+    JOIN posts_comment c
+        ON c.post_id = %s AND c.path >= r.path AND c.path < r.path || %s
+) ranked
+WHERE position <= %s'''
+
+
+class RawSubquery(RawSQL):
+    """RawSQL для ``__in``: скобки вокруг подзапроса ставит сам lookup."""
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def thread(root):
+    """Комментарий со всеми ответами в порядке обхода дерева.
+
+    Комментарий без пути (вставленный в обход ``Comment.save``) отдаётся
+    один: пустой префикс накрыл бы все комментарии поста.
+    """
+    if not root.path:
+        return Comment.objects.filter(pk=root.pk).select_related('author')
+    return Comment.objects.filter(
+        post_id=root.post_id,
+        path__gte=root.path,
+        path__lt=root.path + PATH_END,
+    ).select_related('author').order_by('path')
+
+
+def roots_after(post, after=None):
+    """Корневые комментарии поста по ключу ``(created, id)`` после ``after``.
+
+    Курсор — id последнего показанного корня; его дата берётся
+    подзапросом, поэтому страница остаётся одним запросом. Корни без
+    пути пропускаются: их диапазон ``['', '~')`` накрыл бы весь пост.
+    """
+    roots = Comment.objects.filter(post=post, depth=0).exclude(path='')
+    if after is not None:
+        cursor = Comment.objects.filter(pk=after).values('created')
+        roots = roots.filter(
+            Q(created__gt=Subquery(cursor))
+            | Q(created=Subquery(cursor), pk__gt=after))
+    return roots.order_by('created', 'pk')
+
+
+def load_threads(post, after=None, threads=None, replies=None):
+    """Страница веток поста: корни после курсора и первые ответы в них.
+
+    Корни и ответы выбирает одна оконная функция, авторов подтягивает
+    тот же запрос. У корня с обрезанными ответами ``has_more`` истинно.
+    Возвращает комментарии в порядке вывода и курсор следующей страницы.
+    """
+    threads = threads or settings.COMMENT_THREADS_SHOWN
+    replies = replies or settings.COMMENT_REPLIES_SHOWN
+    roots_sql, roots_params = roots_after(post, after).values(
+        'path')[:threads + 1].query.sql_with_params()
+    # Лишние корень и ответ показывают, что продолжение есть.
+    ids = RawSubquery(
+        THREADS_SQL.format(roots=roots_sql),
+        (*roots_params, post.pk, PATH_END, replies + 2))
+    comments = Comment.objects.filter(pk__in=ids).select_related(
+        'author').order_by('path')
+    branches = []
+    for comment in comments:
+        if not comment.depth:
+            comment.has_more = False
+            branches.append([comment])
+        elif len(branches[-1]) > replies:
+            branches[-1][0].has_more = True
+        else:
+            branches[-1].append(comment)
+    branches.sort(key=lambda branch: (branch[0].created, branch[0].pk))
+    next_cursor = None
+    if len(branches) > threads:
+        branches = branches[:threads]
+        next_cursor = branches[-1][0].pk
+    return [comment for branch in branches for comment in branch], next_cursor
@@ -0,0 +1,94 @@
+"""Популярные посты, группы и авторы.
+
+Каждое событие (комментарий, пост в группе, подписка) увеличивает счётчик
+объекта в текущем интервале ``TRENDING_BUCKET_SECONDS``. Периодический
+пересчёт складывает интервалы окна с экспоненциальным затуханием и
+кладёт отсортированные списки id в кэш, откуда их читают страницы.
+Пересчёт идёт в воркере, а читают веб-процессы, поэтому кэш
+``TRENDING_CACHE`` должен быть общим (``core.caches``).
+"""
+import heapq
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.tasks import task
+
+from .models import ActivityBucket
+
+TRENDING_KEY = 'trending:{}'
+REFRESH_LOCK_KEY = 'trending-refresh'
+
+
+def _cache():
+    return caches[settings.TRENDING_CACHE]
+
+
+def bucket_start(moment):
+    step = settings.TRENDING_BUCKET_SECONDS
+    seconds = int(moment.timestamp()) // step * step
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+def record(kind, object_id, hits=1):
+    """Добавляет события объекту в текущем интервале."""
+    lookup = {
+        'kind': kind,
+        'object_id': object_id,
+        'bucket': bucket_start(timezone.now()),
+    }
+    buckets = ActivityBucket.objects.filter(**lookup)
+    if buckets.update(hits=F('hits') + hits):
+        return
+    try:
+        with transaction.atomic():
+            ActivityBucket.objects.create(hits=hits, **lookup)
+    except IntegrityError:
+        buckets.update(hits=F('hits') + hits)
+
+
+@task
+def refresh():
+    """Пересчитывает рейтинги по интервалам окна и удаляет старые."""
+    now = timezone.now()
+    window_start = now - timedelta(seconds=settings.TRENDING_WINDOW_SECONDS)
+    half_life = settings.TRENDING_HALF_LIFE_SECONDS
+    scores = defaultdict(dict)
+    for kind, object_id, bucket, hits in ActivityBucket.objects.filter(
+            bucket__gte=bucket_start(window_start)).values_list(
+            'kind', 'object_id', 'bucket', 'hits').iterator():
+        age = (now - bucket).total_seconds()
+        kind_scores = scores[kind]
+        kind_scores[object_id] = (kind_scores.get(object_id, 0)
+                                  + hits * 0.5 ** (age / half_life))
+    checked_at = time.time()
+    for kind, _ in ActivityBucket.KINDS:
+        top = heapq.nlargest(settings.TRENDING_SIZE,
+                             scores[kind].items(), key=lambda item: item[1])
+        _cache().set(TRENDING_KEY.format(kind),
+                     (checked_at, [object_id for object_id, _ in top]), None)
+    ActivityBucket.objects.filter(
+        bucket__lt=bucket_start(window_start)).delete()
+
+
+def top_ids(kind):
+    """Отсортированные по популярности id объектов.
+
+    Страница никогда не пересчитывает рейтинг сама: устаревший список
+    отдаётся как есть, без списка в кэше — пустой, а пересчёт ставится в
+    очередь фоновых задач. Блокировка на атомарном ``add`` общего кэша
+    не даёт поставить его дважды.
+    """
+    cached = _cache().get(TRENDING_KEY.format(kind))
+    refreshed_at, ids = cached if cached is not None else (0, [])
+    stale = time.time() - refreshed_at > settings.TRENDING_REFRESH_SECONDS
+    if stale and _cache().add(REFRESH_LOCK_KEY, True,
+                              settings.TRENDING_REFRESH_SECONDS):
+        refresh.delay()
+    return ids
@@ -6,17 +6,69 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='groups'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/subscribe/',
+        views.group_subscribe,
+        name='group_subscribe'
+    ),
+    path(
+        'group/<slug:slug>/unsubscribe/',
+        views.group_unsubscribe,
+        name='group_unsubscribe'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='create_post'),
+    path('drafts/', views.draft_list, name='drafts'),
+    path('drafts/<int:draft_id>/', views.draft_edit, name='draft_edit'),
+    path(
+        'drafts/<int:draft_id>/delete/',
+        views.draft_delete,
+        name='draft_delete'
+    ),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('feed/', views.news_feed, name='feed'),
+    path('mutes/', views.mute_list, name='mutes'),
+    path('mutes/<int:mute_id>/delete/', views.unmute, name='unmute'),
+    path(
+        'profile/<str:username>/mute/',
+        views.mute_author,
+        name='mute_author'
+    ),
+    path('group/<slug:slug>/mute/', views.mute_group, name='mute_group'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('follow/import/', views.follow_import, name='follow_import'),
+    path('unfollow/bulk/', views.unfollow_bulk, name='unfollow_bulk'),
+    path('stream/', views.posts_stream, name='posts_stream'),
+    path('trending/', views.trending_posts, name='trending'),
+    path(
+        'notifications/',
+        views.notification_list,
+        name='notifications'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,4 +79,14 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/followers/',
+        views.followers,
+        name='followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.following,
+        name='following'
+    ),
 ]
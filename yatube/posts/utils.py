@@ -1,9 +1,176 @@
+import functools
+import time
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
+from django.views.decorators.cache import cache_page
+
+from core.counts import estimate_count
+
+INDEX_GENERATION_KEY = 'index-page-generation'
+
+
+def cache_index_page(view):
+    """``cache_page`` главной страницы с поколением в префиксе ключа.
+
+    ``forget_index_page`` меняет поколение, и все закэшированные страницы
+    главной разом перестают находиться.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        generation = cache.get(INDEX_GENERATION_KEY, 0)
+        cached_view = cache_page(
+            settings.SECONDS, key_prefix=f'index_page:{generation}')(view)
+        return cached_view(request, *args, **kwargs)
+    return wrapper
+
+
+def forget_index_page():
+    cache.set(INDEX_GENERATION_KEY, time.time(), None)
+
+
+class WindowPaginator(Paginator):
+    """Пагинатор, который отдаёт шаблону только окно номеров страниц."""
+
+    ELLIPSIS = '…'
+    counted = True
+    approximate = False
+
+    def get_elided_page_range(self, number=1, on_each_side=None,
+                              on_ends=None):
+        """Первые и последние страницы плюс окно вокруг текущей."""
+        if on_each_side is None:
+            on_each_side = settings.PAGINATOR_ON_EACH_SIDE
+        if on_ends is None:
+            on_ends = settings.PAGINATOR_ON_ENDS
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1,
+                             self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class UncountedPaginator(WindowPaginator):
+    """Пагинатор без COUNT(*).
+
+    О наличии следующей страницы узнаёт по одной лишней записи в выборке,
+    поэтому ``count`` и ``num_pages`` известны лишь до текущей страницы.
+    """
+
+    counted = False
 
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
 
-def get_page_obj(request, posts):
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTED)
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('На этой странице нет записей')
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        self._update_bounds(number, bottom + len(object_list), has_next)
+        return self._get_page(object_list, number, self)
+
+    def _update_bounds(self, number, seen, has_next):
+        self.count = seen
+        self.num_pages = number + has_next
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+
+class ApproximatePaginator(UncountedPaginator):
+    """Пагинатор с приблизительным числом записей.
+
+    Число берётся из ``core.counts.estimate_count`` и уточняется по
+    выбранной странице: на последней странице оно становится точным.
+    ``approximate`` ложно, когда число точное.
+    """
+
+    counted = True
+    approximate = True
+
+    @cached_property
+    def count(self):
+        count, exact = estimate_count(self.object_list)
+        self.approximate = not exact
+        return count
+
+    def _update_bounds(self, number, seen, has_next):
+        if not has_next:
+            super()._update_bounds(number, seen, has_next)
+            self.approximate = False
+            return
+        if seen + 1 > self.count:
+            # Страница опровергла число: теперь это лишь нижняя граница.
+            self.count = seen + 1
+            self.approximate = True
+        self.__dict__.pop('num_pages', None)
+        self.num_pages = max(self.num_pages, number + 1)
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            # Оценка оказалась завышенной — уточняем её точным подсчётом.
+            self.count = self.object_list.count()
+            self.approximate = False
+            self.__dict__.pop('num_pages', None)
+            return self.page(max(self.num_pages, 1))
+
+
+PAGINATORS = {
+    'exact': WindowPaginator,
+    'approximate': ApproximatePaginator,
+    'none': UncountedPaginator,
+}
+
+
+def get_page_obj(request, posts, count_mode=None):
+    if count_mode is None:
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        count_mode = settings.PAGINATOR_COUNT_MODES.get(
+            view_name, settings.PAGINATOR_COUNT_DEFAULT)
+    paginator_class = PAGINATORS[count_mode]
+    paginator = paginator_class(posts, settings.NUMBER_OF_POSTED)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.page_window = list(
+        paginator.get_elided_page_range(page_obj.number))
     return page_obj
+
+
+def in_order(queryset, ids):
+    """Объекты выборки с переданными id в том же порядке."""
+    objects = queryset.in_bulk(list(ids))
+    return [objects[pk] for pk in ids if pk in objects]
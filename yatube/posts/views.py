@@ -1,63 +1,235 @@
 from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import DatabaseError, IntegrityError, transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import get_page_obj
+from core.counts import estimate_count
+from core.pubsub import get_broker
+from core.ratelimit import charge, ratelimit
+from core.views import too_many_requests
+from core.writebuffer import write
 
+from . import (drafts, feed, follow_graph, group_stats, mutes, revisions,
+               trending)
+from .forms import (CommentForm, DraftForm, FollowImportForm,
+                    FollowListForm, MuteWordForm, PostForm)
+from .models import (ActivityBucket, ArchivedPost, Comment, Draft, Follow,
+                     Group, GroupSubscription, Mute, Post, User)
+from .notifications import mark_read
+from .recommendations import get_suggestions
+from .signals import NEW_POSTS_CHANNEL
+from .stream import new_posts_events
+from .tasks import warm_thumbnails
+from .threads import load_threads, thread
+from .utils import cache_index_page, get_page_obj, in_order
 
-@cache_page(settings.SECONDS, key_prefix='index_page')
+
+@cache_index_page
 def index(request):
+    stream_seq = get_broker().last_seq(NEW_POSTS_CHANNEL)
     posts = Post.objects.select_related('author', 'group')
     context = {
         'page_obj': get_page_obj(request, posts),
         'index': True,
+        'stream_seq': stream_seq,
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.select_related('author', 'group')
+    page_obj = get_page_obj(request, posts)
+    followed_authors = set()
+    subscribed = muted = False
+    if request.user.is_authenticated:
+        followed_authors = follow_graph.followed_among(
+            request.user.id, [post.author_id for post in page_obj])
+        subscribed = group.subscribers.filter(user=request.user).exists()
+        muted = mutes.is_muted(
+            mutes.rules(request.user.id).group_ids, group.id)
     context = {
         'group': group,
-        'page_obj': get_page_obj(request, posts)
+        'page_obj': page_obj,
+        'followed_authors': followed_authors,
+        'subscribed': subscribed,
+        'muted': muted,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@login_required
+@ratelimit('follow', methods=None)
+def group_subscribe(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupSubscription.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', group.slug)
+
+
+@login_required
+@ratelimit('follow', methods=None)
+def group_unsubscribe(request, slug):
+    GroupSubscription.objects.filter(
+        user=request.user, group__slug=slug).delete()
+    return redirect('posts:group_list', slug)
+
+
+def group_index(request):
+    sort = request.GET.get('sort')
+    if sort not in group_stats.ORDERINGS:
+        sort = 'posts'
+    context = {
+        'page_obj': get_page_obj(request, group_stats.directory(sort)),
+        'sort': sort,
+    }
+    return render(request, 'posts/groups.html', context)
+
+
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('author', 'group')
-    following = (
-        request.user.is_authenticated
-        and author.following.filter(user=request.user).exists())
+    archive = request.GET.get('archive') == '1'
+    posts = (author.archived_posts if archive else author.posts
+             ).select_related('author', 'group')
+    following = muted = False
+    if request.user.is_authenticated:
+        following = follow_graph.is_following(request.user.id, author.id)
+        muted = mutes.is_muted(
+            mutes.rules(request.user.id).author_ids, author.id)
     context = {
         'author': author,
         'page_obj': get_page_obj(request, posts),
-        'following': following
+        'following': following,
+        'muted': muted,
+        'followers_count': len(follow_graph.follower_ids(author.id)),
+        'following_count': len(follow_graph.following_ids(author.id)),
+        'archive': archive,
     }
+    if request.user == author:
+        context['suggestions'] = get_suggestions(request.user)
     return render(request, 'posts/profile.html', context)
 
 
+def _author_posts_count(author):
+    count, exact = estimate_count(author.posts.all())
+    return {'author_posts_count': count,
+            'author_posts_approximate': not exact}
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = Post.objects.select_related(
+        'author', 'group').filter(id=post_id).first()
+    if post is None:
+        return archived_post_detail(request, post_id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'reply_to': _reply_to(request, post),
     }
+    context.update(_author_posts_count(post.author))
+    context['comments'], context['next_cursor'] = load_threads(
+        post, _cursor(request))
     return render(request, 'posts/post_detail.html', context)
 
 
+def archived_post_detail(request, post_id):
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'), id=post_id)
+    context = {
+        'post': post,
+        'archived': True,
+        'comments': post.comments.select_related('author').order_by('path'),
+    }
+    context.update(_author_posts_count(post.author))
+    return render(request, 'posts/post_detail.html', context)
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    comments, next_cursor = load_threads(post, _cursor(request))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'parent': comment.parent_id,
+                    'depth': comment.depth,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                    'has_more': getattr(comment, 'has_more', False),
+                }
+                for comment in comments
+            ],
+            'next': next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def comment_thread(request, post_id, comment_id):
+    root = get_object_or_404(
+        Comment.objects.select_related('post'), id=comment_id, post_id=post_id)
+    context = {
+        'post': root.post,
+        'form': CommentForm(),
+        'comments': thread(root),
+        'reply_to': _reply_to(request, root.post),
+    }
+    return render(request, 'posts/comment_thread.html', context)
+
+
+def _cursor(request, name='after'):
+    value = request.GET.get(name, '')
+    return int(value) if value.isdigit() else None
+
+
+def _reply_to(request, post):
+    reply = request.GET.get('reply')
+    if not reply or not reply.isdigit() or not request.user.is_authenticated:
+        return None
+    return post.comments.select_related('author').filter(pk=reply).first()
+
+
+def trending_posts(request):
+    page_obj = get_page_obj(
+        request, trending.top_ids(ActivityBucket.POST), count_mode='exact')
+    page_obj.object_list = in_order(
+        Post.objects.select_related('author', 'group'),
+        page_obj.object_list)
+    hot_groups = trending.top_ids(ActivityBucket.GROUP)
+    rising_authors = trending.top_ids(ActivityBucket.AUTHOR)
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+        'hot_groups': in_order(
+            Group.objects.all(), hot_groups[:settings.TRENDING_SHOWN]),
+        'rising_authors': in_order(
+            User.objects.all(), rising_authors[:settings.TRENDING_SHOWN]),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 @login_required
+@ratelimit('post')
 def post_create(request):
     form = PostForm(request.POST or None)
     if form.is_valid():
+        if 'draft' in request.POST:
+            draft = Draft.objects.create(
+                author=request.user,
+                text=form.cleaned_data['text'],
+                group=form.cleaned_data['group'],
+                image=form.cleaned_data['image'] or '',
+            )
+            return redirect('posts:draft_edit', draft.pk)
         post = form.save(commit=False)
         post.author = request.user
         form.save()
@@ -66,6 +238,53 @@ def post_create(request):
 
 
 @login_required
+def draft_list(request):
+    context = {'drafts': request.user.drafts.select_related('group')}
+    return render(request, 'posts/drafts.html', context)
+
+
+@login_required
+@ratelimit('post')
+def draft_edit(request, draft_id):
+    draft = get_object_or_404(request.user.drafts, pk=draft_id)
+    form = DraftForm(request.POST or None,
+                     files=request.FILES or None,
+                     instance=draft)
+    if form.is_valid():
+        draft = form.save(commit=False)
+        try:
+            # Только UPDATE: черновик, который тем временем опубликовала
+            # задача publish_due, не должен вставиться заново.
+            with transaction.atomic():
+                draft.save(force_update=True)
+        except DatabaseError:
+            return _draft_gone(request)
+        if 'publish' in request.POST:
+            post = drafts.publish(draft)
+            if post is None:
+                return _draft_gone(request)
+            return redirect('posts:post_detail', post.pk)
+        if 'publish_at' in form.changed_data:
+            drafts.schedule(draft)
+        return redirect('posts:drafts')
+    return render(request, 'posts/draft.html',
+                  {'form': form, 'draft': draft})
+
+
+def _draft_gone(request):
+    messages.info(request, 'Черновик уже опубликован или удалён.')
+    return redirect('posts:drafts')
+
+
+@login_required
+@require_POST
+def draft_delete(request, draft_id):
+    request.user.drafts.filter(pk=draft_id).delete()
+    return redirect('posts:drafts')
+
+
+@login_required
+@ratelimit('post')
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user != post.author:
@@ -74,7 +293,11 @@ def post_edit(request, post_id):
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
-        form.save()
+        with transaction.atomic():
+            form.save()
+            revisions.record_edit(form)
+        if 'image' in form.changed_data and post.image:
+            warm_thumbnails.delay(post.pk)
         return redirect('posts:post_detail', post_id)
     context = {
         'post': post,
@@ -85,6 +308,27 @@ def post_edit(request, post_id):
 
 
 @login_required
+def post_history(request, post_id):
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        post = get_object_or_404(ArchivedPost, id=post_id)
+    if request.user != post.author and not request.user.is_staff:
+        return redirect('posts:post_detail', post_id)
+    history = post.revisions.defer('data')
+    context = {
+        'post': post,
+        'page_obj': get_page_obj(request, history),
+    }
+    number = request.GET.get('rev', '')
+    if number.isdigit():
+        revision = get_object_or_404(history, number=number)
+        context['revision'] = revision
+        context['revision_text'] = revisions.revision_text(revision)
+    return render(request, 'posts/post_history.html', context)
+
+
+@login_required
+@ratelimit('comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -92,31 +336,246 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        form.save()
+        parent = request.POST.get('parent')
+        if parent and parent.isdigit():
+            comment.parent = post.comments.filter(pk=parent).first()
+        write(comment, owner=request.user.pk)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user)
+    stream_seq = get_broker().last_seq(NEW_POSTS_CHANNEL)
+    author_ids = follow_graph.following_ids(request.user.id)
+    if len(author_ids) <= settings.FOLLOW_GRAPH_MAX_IN:
+        posts = Post.objects.filter(author_id__in=list(author_ids))
+    else:
+        posts = Post.objects.filter(author__following__user=request.user)
+    posts = mutes.apply(posts, request.user.id).select_related(
+        'author', 'group')
     context = {
         'page_obj': get_page_obj(request, posts),
-        'follow': True
+        'follow': True,
+        'stream_seq': stream_seq,
+        'suggestions': get_suggestions(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+def news_feed(request):
+    before = feed.load_cursor(request.GET.get('before', ''))
+    posts, next_cursor = feed.page(request.user, before)
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'feed': True,
+        'followed_authors': follow_graph.followed_among(
+            request.user.id, [post.author_id for post in posts]),
+    }
+    return render(request, 'posts/feed.html', context)
+
+
+def posts_stream(request):
+    broker = get_broker()
+    since = (request.META.get('HTTP_LAST_EVENT_ID')
+             or request.GET.get('since'))
+    last_seq = broker.last_seq(NEW_POSTS_CHANNEL)
+    try:
+        seq = int(since)
+    except (TypeError, ValueError):
+        seq = last_seq
+    # Номер из будущего остаётся после перезапуска, очистки кэша или от
+    # страницы другого процесса: с ним поток ждал бы вечно.
+    if not 0 <= seq <= last_seq:
+        seq = last_seq
+    authors = None
+    if request.GET.get('feed') == 'follow' and request.user.is_authenticated:
+        authors = set(request.user.follower.values_list(
+            'author_id', flat=True))
+    response = StreamingHttpResponse(
+        new_posts_events(seq, authors), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@ratelimit('follow', methods=None)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+    if (request.user != author
+            and not follow_graph.is_following(request.user.id, author.id)):
+        try:
+            write(Follow(user=request.user, author=author),
+                  owner=request.user.pk)
+        except IntegrityError:
+            pass
     return redirect('posts:profile', author.username)
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+def _charge_bulk(request, usernames):
+    """Списывает массовую операцию с лимита по числу логинов."""
+    retry_after = charge(request, 'follow_bulk', max(len(usernames), 1))
+    if retry_after:
+        return too_many_requests(request, retry_after)
+    return None
+
+
+@login_required
+def follow_bulk(request):
+    form = FollowListForm(request.POST or None, prefix='follow')
+    if form.is_valid():
+        limited = _charge_bulk(request, form.cleaned_data['usernames'])
+        if limited:
+            return limited
+        follow_graph.follow_usernames(
+            request.user, form.cleaned_data['usernames'])
+        return redirect('posts:following', request.user.username)
+    context = {
+        'form': form,
+        'unfollow_form': FollowListForm(prefix='unfollow'),
+        'import_form': FollowImportForm(),
+    }
+    return render(request, 'posts/follow_bulk.html', context)
+
+
+@login_required
+def unfollow_bulk(request):
+    form = FollowListForm(request.POST or None, prefix='unfollow')
+    if form.is_valid():
+        limited = _charge_bulk(request, form.cleaned_data['usernames'])
+        if limited:
+            return limited
+        follow_graph.unfollow_usernames(
+            request.user, form.cleaned_data['usernames'])
+        return redirect('posts:following', request.user.username)
+    context = {
+        'form': FollowListForm(prefix='follow'),
+        'unfollow_form': form,
+        'import_form': FollowImportForm(),
+    }
+    return render(request, 'posts/follow_bulk.html', context)
+
+
+@login_required
+def follow_import(request):
+    form = FollowImportForm(request.POST or None,
+                            files=request.FILES or None)
+    if form.is_valid():
+        limited = _charge_bulk(request, form.cleaned_data['file'])
+        if limited:
+            return limited
+        follow_graph.follow_usernames(
+            request.user, form.cleaned_data['file'])
+        return redirect('posts:following', request.user.username)
+    context = {
+        'form': FollowListForm(prefix='follow'),
+        'unfollow_form': FollowListForm(prefix='unfollow'),
+        'import_form': form,
+    }
+    return render(request, 'posts/follow_bulk.html', context)
+
+
+@login_required
+def notification_list(request):
+    notifications = request.user.notifications.select_related(
+        'actor', 'post').order_by('-id')
+    before = _cursor(request, 'before')
+    if before is not None:
+        notifications = notifications.filter(id__lt=before)
+    page = list(notifications[:settings.NOTIFICATIONS_PER_PAGE + 1])
+    next_cursor = None
+    if len(page) > settings.NOTIFICATIONS_PER_PAGE:
+        page = page[:settings.NOTIFICATIONS_PER_PAGE]
+        next_cursor = page[-1].id
+    unread = [notification.id for notification in page
+              if not notification.is_read]
+    if unread:
+        mark_read(request.user.id, unread)
+    context = {
+        'notifications': page,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+@login_required
+def mute_list(request):
+    form = MuteWordForm(request.POST or None)
+    if form.is_valid():
+        words = request.user.mutes.filter(kind=Mute.WORD)
+        if words.count() >= settings.MUTE_WORDS_LIMIT:
+            form.add_error('word', f'Не больше {settings.MUTE_WORDS_LIMIT} '
+                                   f'скрытых слов')
+        else:
+            Mute.objects.get_or_create(user=request.user, kind=Mute.WORD,
+                                       word=form.cleaned_data['word'])
+            return redirect('posts:mutes')
+    context = {
+        'form': form,
+        'mutes': request.user.mutes.select_related(
+            'author', 'group').order_by('kind', 'pk'),
+    }
+    return render(request, 'posts/mutes.html', context)
+
+
+@login_required
+@ratelimit('follow', methods=None)
+def mute_author(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Mute.objects.get_or_create(user=request.user, kind=Mute.AUTHOR,
+                                   author=author)
+    return redirect('posts:profile', author.username)
+
+
+@login_required
+@ratelimit('follow', methods=None)
+def mute_group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    Mute.objects.get_or_create(user=request.user, kind=Mute.GROUP,
+                               group=group)
+    return redirect('posts:group_list', group.slug)
+
+
+@login_required
+def unmute(request, mute_id):
+    mute = get_object_or_404(
+        request.user.mutes.select_related('author', 'group'), pk=mute_id)
+    mute.delete()
+    if mute.kind == Mute.AUTHOR:
+        return redirect('posts:profile', mute.author.username)
+    if mute.kind == Mute.GROUP:
+        return redirect('posts:group_list', mute.group.slug)
+    return redirect('posts:mutes')
+
+
+def _follow_list(request, username, get_ids, title):
+    author = get_object_or_404(User, username=username)
+    page_obj = get_page_obj(request, get_ids(author.id), count_mode='exact')
+    page_obj.object_list = in_order(User.objects.all(), page_obj.object_list)
+    context = {
+        'author': author,
+        'page_obj': page_obj,
+        'title': title,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def followers(request, username):
+    return _follow_list(
+        request, username, follow_graph.follower_ids, 'Подписчики')
+
+
+def following(request, username):
+    return _follow_list(
+        request, username, follow_graph.following_ids, 'Подписки')
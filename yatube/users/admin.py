@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import message_task
+from posts import moderation
+
+User = get_user_model()
+
+
+class ModeratedUserAdmin(UserAdmin):
+    actions = ('purge_users',)
+
+    def purge_users(self, request, queryset):
+        user_ids = list(queryset.filter(is_superuser=False).exclude(
+            pk=request.user.pk).values_list('pk', flat=True))
+        task = moderation.purge_users.delay(user_ids)
+        message_task(self, request, task,
+                     f'Удаление пользователей со всем содержимым: '
+                     f'{len(user_ids)}')
+    purge_users.short_description = (
+        'Удалить пользователей со всеми постами и комментариями')
+
+
+admin.site.unregister(User)
+admin.site.register(User, ModeratedUserAdmin)
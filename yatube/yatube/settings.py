@@ -1,4 +1,6 @@
+import hashlib
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -15,8 +17,41 @@ ALLOWED_HOSTS = [
 
 NUMBER_OF_POSTED = 10
 
+PAGINATOR_ON_EACH_SIDE = 3
+
+PAGINATOR_ON_ENDS = 1
+
+# Способ подсчёта записей для пагинации: 'exact' — COUNT(*),
+# 'approximate' — статистика СУБД или кэш, 'none' — без подсчёта.
+PAGINATOR_COUNT_DEFAULT = 'exact'
+
+PAGINATOR_COUNT_MODES = {
+    'posts:index': 'approximate',
+    'posts:profile': 'approximate',
+    'posts:follow_index': 'none',
+    'posts:groups': 'approximate',
+}
+
+# Кэш чисел core.counts; блокировка пересчёта требует атомарного add.
+COUNT_CACHE = 'default'
+
+COUNT_CACHE_SECONDS = 60
+
+COUNT_CACHE_STALE_SECONDS = 60 * 60
+
+COUNT_REFRESH_ASYNC = True
+
 SLICE = 15
 
+# Ветки комментариев: ширина шага пути (base36) и предельная вложенность.
+COMMENT_PATH_STEP = 7
+
+COMMENT_MAX_DEPTH = 8
+
+COMMENT_THREADS_SHOWN = 20
+
+COMMENT_REPLIES_SHOWN = 3
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -37,6 +72,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.WriteBufferMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,6 +92,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
@@ -70,6 +107,34 @@ DATABASES = {
     }
 }
 
+AUTHENTICATION_BACKENDS = ['core.backends.CachedModelBackend']
+
+# Сессии: cached_db читает из кэша и пишет в базу; без обращений к базе
+# и кэшу — 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+SESSION_CACHE_ALIAS = 'default'
+
+USER_CACHE = 'default'
+
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Первый хешер используется для новых паролей; хеши остальных
+# перехешируются им при входе. Замер: python manage.py benchmark_hashers.
+# scrypt с n=16384 медленнее PBKDF2 по умолчанию (24 входа/с против 25),
+# поэтому он подключается явно: поставить его первым стоит только со
+# стоимостью, которая по замеру дешевле текущей.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'core.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+if not hasattr(hashlib, 'scrypt'):
+    PASSWORD_HASHERS.remove('core.hashers.ScryptPasswordHasher')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,10 +168,19 @@ LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+
+# Бэкенд, через который задачи core.mail доставляют письма.
+EMAIL_QUEUE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+EMAIL_QUEUE_BATCH = 100
+
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+
+EMAIL_QUEUE_RETRY_BACKOFF = 1
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 # Static files (CSS, JavaScript, Images)
@@ -115,9 +189,18 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш по умолчанию общий для веб-процессов и воркера runworker: граф
+# подписок и другие записи сбрасываются изменившим их процессом, а читаются
+# всеми, а счётчики лимитов и блокировки обновления опираются на атомарные
+# add и incr. Файловый кэш core.caches.AtomicFileBasedCache работает на одной
+# машине; на нескольких — memcached или redis. Другие бэкенды отклоняет
+# проверка core.E001.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.caches.AtomicFileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+        'KEY_FUNCTION': 'core.caches.make_key',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     },
     'index_page': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -125,3 +208,141 @@ CACHES = {
 }
 
 SECONDS = 20
+
+PUBSUB_BROKER = 'core.pubsub.LocalBroker'
+
+PUBSUB_BUFFER_SIZE = 1000
+
+PUBSUB_POLL_SECONDS = 1
+
+STREAM_MAX_SECONDS = 300
+
+STREAM_HEARTBEAT_SECONDS = 15
+
+STREAM_RETRY_MS = 5000
+
+FOLLOW_GRAPH_CACHE = 'default'
+
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+# Срок блокировки сборки и правки массива графа подписок.
+FOLLOW_GRAPH_LOCK_SECONDS = 5
+
+FOLLOW_BULK_LIMIT = 500
+
+# Больше id в IN-списке ленты подписок — переходим на JOIN с Follow.
+FOLLOW_GRAPH_MAX_IN = 500
+
+SUGGESTIONS_PER_USER = 20
+
+SUGGESTIONS_SHOWN = 5
+
+SUGGESTION_WEIGHTS = {'follows': 1.0, 'comments': 0.5, 'groups': 0.2}
+
+# Большие группы почти ничего не говорят о вкусах и раздувают расчёт.
+SUGGESTION_MAX_GROUP_SIZE = 1000
+
+# То же для постов: обсуждение вирусного поста стоит квадрат числа
+# комментаторов и говорит о вкусах не больше большой группы.
+SUGGESTION_MAX_POST_COMMENTERS = 1000
+
+# Популярное: счётчики по интервалам, окно и период полураспада веса.
+TRENDING_BUCKET_SECONDS = 60 * 60
+
+TRENDING_WINDOW_SECONDS = 60 * 60 * 48
+
+TRENDING_HALF_LIFE_SECONDS = 60 * 60 * 6
+
+TRENDING_REFRESH_SECONDS = 60
+
+# Рейтинги пересчитывает воркер, а читает веб: кэш должен быть общим.
+TRENDING_CACHE = 'default'
+
+TRENDING_SIZE = 100
+
+TRENDING_SHOWN = 10
+
+# Фоновые задачи core.tasks: воркер — python manage.py runworker.
+TASKS_ALWAYS_EAGER = False
+
+TASK_MAX_ATTEMPTS = 5
+
+TASK_RETRY_BACKOFF = 10
+
+TASK_POLL_SECONDS = 1
+
+TASK_CLAIM_BATCH = 10
+
+TASK_RESULT_TTL = 60 * 60 * 24
+
+# Задача без отметки воркера дольше этого срока снова ставится в очередь.
+TASK_LEASE_SECONDS = 60 * 10
+
+# Пока задача выполняется, воркер отмечается с этим интервалом.
+TASK_HEARTBEAT_SECONDS = 60
+
+TASK_METRICS_WINDOW = 100
+
+# Размер пачки массовых действий модерации (core.purge, posts.moderation).
+PURGE_CHUNK_SIZE = 1000
+
+# Лимиты запросов core.ratelimit: (число запросов, секунды) на
+# пользователя или IP.
+RATELIMIT_ENABLED = True
+
+RATELIMIT_CACHE = 'default'
+
+RATELIMITS = {
+    'post': (30, 60),
+    'comment': (60, 60),
+    'follow': (120, 60),
+    # Массовые подписка, отписка и импорт платят за каждый логин.
+    'follow_bulk': (1000, 60 * 60),
+}
+
+# Буфер записи core.writebuffer: sync — без буфера, group — групповой
+# коммит с ожиданием, async — запись в фоне без ожидания. Буфер свой у
+# каждого процесса: свои записи автор видит сразу, только пока его
+# запросы обслуживает один процесс.
+WRITE_BUFFER_MODE = 'sync'
+
+WRITE_BUFFER_BATCH = 50
+
+WRITE_BUFFER_FLUSH_SECONDS = 0.005
+
+NOTIFICATIONS_PER_PAGE = 20
+
+NOTIFICATIONS_BATCH_SIZE = 500
+
+NOTIFICATIONS_COUNT_TIMEOUT = 60 * 60
+
+# Уведомления создаёт воркер, а счётчик читает веб: кэш должен быть общим.
+NOTIFICATIONS_CACHE = 'default'
+
+# Архив постов posts.archive: посты старше горизонта с комментариями
+# переносятся в отдельные таблицы командой archive_posts.
+ARCHIVE_AFTER_DAYS = 365
+
+ARCHIVE_BATCH_SIZE = 500
+
+# История правок постов posts.revisions: каждая N-я версия хранится
+# целиком, остальные — обратными дельтами.
+REVISION_SNAPSHOT_EVERY = 10
+
+# Каталог групп posts.group_stats: размер пачки при полном пересчёте
+# статистики командой rebuild_group_stats.
+GROUP_STATS_BATCH_SIZE = 1000
+
+# Скрытие постов в лентах posts.mutes: правила пользователя хранятся в общем
+# кэше; больше id в IN-списке — исключаем подзапросом к Mute.
+MUTES_CACHE = 'default'
+
+MUTES_TIMEOUT = 60 * 60 * 24
+
+MUTES_MAX_IN = 500
+
+MUTE_WORDS_LIMIT = 50
+
+# Отложенная публикация posts.drafts: наступившие черновики публикуются
+# пачками в одной транзакции.
+SCHEDULER_BATCH_SIZE = 100